@@ -0,0 +1,130 @@
+"""
+Accuracy and latency of the degree encoder backends (see degree_encoder.py).
+
+Each backend runs in a fresh subprocess and reports its startup, first,
+per-college and whole-vocabulary encode times. The run exits with status 1
+if any degree's best reference match differs from the first backend's.
+
+    python benchmark_encoder.py india_usa_whole_data.csv --backends torch onnx int8
+"""
+import argparse
+import json
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from degree_encoder import BACKENDS, DEFAULT_BACKEND, LazyEncoder
+from degree_ranking import DEFAULT_PATH, MODEL_NAME, REFERENCE_DEGREES, best_matches
+
+# Degrees encoded per call in the "college" measurement.
+COLLEGE_DEGREES = 20
+
+
+def benchmark_backend(backend, degrees, batch_size, repeat):
+    """Runs in a fresh process, so the startup includes importing torch."""
+    encoder = LazyEncoder(MODEL_NAME, backend)
+    start = time.perf_counter()
+    encoder.load()
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoder.encode(degrees[:1])
+    first = time.perf_counter() - start
+
+    college = []
+    for i in range(repeat):
+        batch = degrees[i * COLLEGE_DEGREES:(i + 1) * COLLEGE_DEGREES] or degrees[:COLLEGE_DEGREES]
+        start = time.perf_counter()
+        encoder.encode(batch, batch_size=batch_size)
+        college.append(time.perf_counter() - start)
+
+    texts = degrees + REFERENCE_DEGREES
+    vocabulary = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectors = encoder.encode(texts, batch_size=batch_size)
+        vocabulary.append(time.perf_counter() - start)
+    seconds = statistics.median(vocabulary)
+    return {
+        "backend": backend,
+        "startup_s": startup,
+        "first_ms": first * 1000,
+        "college_ms": statistics.median(college) * 1000,
+        "vocabulary_s": seconds,
+        "degrees_per_s": len(texts) / seconds,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "vectors": np.asarray(vectors, dtype=np.float32),
+    }
+
+
+def top1(vectors, n_degrees):
+    """Best reference match and its similarity for each of the first `n_degrees` rows."""
+    return best_matches(cosine_similarity(vectors[:n_degrees], vectors[n_degrees:]))
+
+
+def compare(results, degrees):
+    """Degrees whose top-1 reference differs from the first backend's, per backend."""
+    baseline, baseline_score = top1(results[0]["vectors"], len(degrees))
+    changes = {}
+    for result in results[1:]:
+        match, score = top1(result["vectors"], len(degrees))
+        changed = np.flatnonzero(match != baseline)
+        result["top1_agreement"] = 1 - len(changed) / max(len(degrees), 1)
+        result["max_score_diff"] = float(np.abs(score - baseline_score).max()) if len(degrees) else 0.0
+        changes[result["backend"]] = [
+            (degrees[i], REFERENCE_DEGREES[baseline[i]], REFERENCE_DEGREES[match[i]]) for i in changed
+        ]
+    return changes
+
+
+def print_report(results):
+    print(f"{'backend':<8} {'startup s':>10} {'first ms':>10} {'college ms':>11} {'vocab s':>9} "
+          f"{'deg/s':>9} {'RSS MB':>8} {'top-1':>8} {'max diff':>9}")
+    for result in results:
+        agreement = result.get("top1_agreement")
+        agreement = "-" if agreement is None else f"{agreement:.2%}"
+        diff = result.get("max_score_diff")
+        diff = "-" if diff is None else f"{diff:.4f}"
+        print(f"{result['backend']:<8} {result['startup_s']:>10.2f} {result['first_ms']:>10.1f} "
+              f"{result['college_ms']:>11.1f} {result['vocabulary_s']:>9.2f} {result['degrees_per_s']:>9.0f} "
+              f"{result['max_rss_mb']:>8.0f} {agreement:>8} {diff:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the accuracy and latency of the encoder backends.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help="CSV whose degrees are encoded")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS,
+                        help=f"the first one is the accuracy baseline (default: {DEFAULT_BACKEND} first)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement (default: %(default)s)")
+    parser.add_argument("--output", help="write the timings and agreement as JSON")
+    args = parser.parse_args()
+
+    degrees = pd.read_csv(args.path, usecols=["degree"])["degree"].dropna().astype(str).unique().tolist()
+    print(f"{len(degrees)} distinct degrees from {args.path}")
+    results = []
+    for backend in args.backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results.append(pool.submit(benchmark_backend, backend, degrees, args.batch_size, args.repeat).result())
+    changes = compare(results, degrees)
+    print_report(results)
+
+    for backend, changed in changes.items():
+        for degree, before, after in changed:
+            print(f"TOP-1 CHANGED {backend}: {degree!r}: {before!r} -> {after!r}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([{k: v for k, v in result.items() if k != "vectors"} for result in results], f, indent=2)
+    if any(changes.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Rerun latency and peak memory of the filter apps under scripted sessions.
+
+Each scenario replays a widget sequence through Streamlit's AppTest, with
+every app in its own subprocess. Steps report the cold and median warm
+latency and the tracemalloc peak; each app reports its peak RSS.
+
+    python synthetic_data.py --preset 1m --out bench/1m/All_country_data.csv
+    python benchmark_filters.py --data-dir bench/1m --output bench/1m.json
+    python benchmark_filters.py --data-dir bench/1m --baseline bench/1m.json
+
+With --baseline the run exits with status 1 when a step's warm latency or
+peak memory exceeds the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+APPS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# A step is (stage name, widget kind, label prefix, option). For selectboxes
+# and multiselects the option is an index into the widget's options or a
+# prefix of an option label; for the cost slider it is a (low, high) pair of
+# fractions of the slider's range; for the page box it is the page number.
+SCENARIOS = {
+    "filter_all.py": {
+        "india": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "India"),
+            ("State", "selectbox", "Select State", 2),
+            ("Institution Type", "selectbox", "Select Institution Type", 1),
+            ("Degree Level", "selectbox", "Select Degree Level", 2),
+            ("Sort by cost", "selectbox", "Sort by", "cost_int"),
+            ("Page 2", "number_input", "Page", 2),
+        ],
+        "australia_new_zealand": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "Australia & New Zealand"),
+            ("State", "selectbox", "Select State", 1),
+            ("Degree Level", "selectbox", "Select Degree Level", 2),
+            ("Cost Range", "slider", "Select Cost Range", (0.1, 0.6)),
+        ],
+    },
+    "final_fiter.py": {
+        "india": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "India"),
+            ("State", "selectbox", "Select State", 2),
+            ("Institution Type", "selectbox", "Select Institution Type", 1),
+            ("Degree Level", "selectbox", "Select Degree Level", 2),
+            ("Page 2", "number_input", "Page", 2),
+        ],
+        "indonesia": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "Indonesia"),
+            ("Cost Range", "slider", "Select Cost Range", (0.0, 0.5)),
+            ("Degree", "selectbox", "Select Degree", 2),
+        ],
+    },
+    "Filter_all_mp4.py": {
+        "usa": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "USA"),
+            ("State", "selectbox", "Select State", 2),
+            ("Degree", "selectbox", "Select Degree", 1),
+            ("Sort by name", "selectbox", "Sort by", "name"),
+        ],
+    },
+    "multiselect_filter_mp4": {
+        "india": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "India"),
+            ("State", "multiselect", "Select State", 1),
+            ("State (second)", "multiselect", "Select State", 2),
+            ("Institution Type", "multiselect", "Select Institution Type", 0),
+            ("Degree Level", "multiselect", "Select Degree Level", 1),
+            ("Page 2", "number_input", "Page", 2),
+        ],
+        "australia_new_zealand": [
+            ("Learning Pathway", "selectbox", "Select Learning Pathway", 1),
+            ("Country", "selectbox", "Select Country", "Australia & New Zealand"),
+            ("State", "multiselect", "Select State", 0),
+            ("Degree Level", "multiselect", "Select Degree Level", 1),
+            ("Cost Range", "slider", "Select Cost Range", (0.2, 0.8)),
+        ],
+    },
+}
+
+
+def _widget(at, kind, label):
+    """The first enabled widget of `kind` whose label starts with `label`, or None."""
+    for widget in getattr(at, kind):
+        if widget.label.startswith(label) and not widget.disabled:
+            return widget
+    return None
+
+
+def _option(widget, option):
+    if isinstance(option, int):
+        return widget.options[option]
+    for candidate in widget.options:
+        if candidate.startswith(option):
+            return candidate
+    raise LookupError(f"{widget.label!r} has no option starting with {option!r}")
+
+
+def _apply(widget, kind, option):
+    if kind in ("selectbox", "multiselect"):
+        return widget.select(_option(widget, option))
+    if kind == "slider":
+        low, high = widget.proto.min, widget.proto.max
+        return widget.set_range(type(widget.value[0])(low + option[0] * (high - low)),
+                                type(widget.value[1])(low + option[1] * (high - low)))
+    if kind == "number_input":
+        return widget.set_value(option)
+    raise ValueError(f"Unsupported widget kind: {kind}")
+
+
+def replay(app, steps, timeout, trace=False):
+    """Run one scripted session; returns [(stage, seconds, peak bytes or None)]."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APPS_DIR, app), default_timeout=timeout)
+    timings = []
+
+    def measure(stage, run):
+        if trace:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{app} failed at {stage}: {at.exception[0].message}")
+        timings.append((stage, elapsed, tracemalloc.get_traced_memory()[1] if trace else None))
+
+    measure("Load", at.run)
+    for stage, kind, label, option in steps:
+        widget = _widget(at, kind, label)
+        if widget is None:
+            # E.g. no page box when a small dataset's slice fits on one page.
+            if not trace:
+                print(f"{app}: skipping {stage!r}, no enabled {kind} labelled {label!r}", file=sys.stderr)
+            continue
+        measure(stage, lambda: _apply(widget, kind, option).run())
+    return timings
+
+
+def benchmark_app(app, data_dir, repeat, timeout):
+    """Benchmark every scenario of `app`; meant to run in a fresh process."""
+    # The apps read All_country_data.csv from the working directory.
+    os.chdir(data_dir)
+    sys.path.insert(0, APPS_DIR)
+    report = {}
+    for name, steps in SCENARIOS[app].items():
+        runs = [replay(app, steps, timeout) for _ in range(repeat + 1)]
+        tracemalloc.start()
+        traced = replay(app, steps, timeout, trace=True)
+        tracemalloc.stop()
+        report[name] = [
+            {
+                "stage": stage,
+                "cold_ms": runs[0][i][1] * 1000,
+                "warm_ms": statistics.median(run[i][1] for run in runs[1:]) * 1000 if repeat else None,
+                "peak_mb": traced[i][2] / 2 ** 20,
+            }
+            for i, stage in enumerate(step[0] for step in runs[0])
+        ]
+    # ru_maxrss is in kilobytes on Linux.
+    return {"scenarios": report, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def compare(results, baseline, tolerance):
+    """Steps that got slower or bigger than the baseline by more than `tolerance`."""
+    regressions = []
+    for app, result in results.items():
+        for scenario, steps in result["scenarios"].items():
+            before = {step["stage"]: step for step in baseline.get(app, {}).get("scenarios", {}).get(scenario, [])}
+            for step in steps:
+                old = before.get(step["stage"])
+                if old is None:
+                    continue
+                for metric in ("warm_ms", "peak_mb"):
+                    if step[metric] is not None and old[metric] and step[metric] > old[metric] * tolerance:
+                        regressions.append(f"{app} / {scenario} / {step['stage']}: "
+                                           f"{metric} {old[metric]:.1f} -> {step[metric]:.1f}")
+    return regressions
+
+
+def print_report(results):
+    for app, result in results.items():
+        print(f"\n{app} (peak RSS {result['max_rss_mb']:.0f} MB)")
+        for scenario, steps in result["scenarios"].items():
+            print(f"  {scenario}")
+            print(f"    {'stage':<20} {'cold ms':>10} {'warm ms':>10} {'peak MB':>10}")
+            for step in steps:
+                warm = "-" if step["warm_ms"] is None else f"{step['warm_ms']:.1f}"
+                print(f"    {step['stage']:<20} {step['cold_ms']:>10.1f} {warm:>10} {step['peak_mb']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the filter apps through AppTest.")
+    parser.add_argument("--data-dir", default=".", help="directory holding All_country_data.csv")
+    parser.add_argument("--apps", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="warm replays per scenario (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed ratio to the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    data_dir = os.path.abspath(args.data_dir)
+    results = {}
+    for app in args.apps:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[app] = pool.submit(benchmark_app, app, data_dir, args.repeat, args.timeout).result()
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import math
+
+import streamlit as st
+import profiler
+from cost_normalization import NORMALIZED_COST
+from filter_plan import country_values
+from filter_ui import memory_sidebar, profile_sidebar, searchable_values
+from programme_index import load_index
+from programme_query import compare_programmes
+from result_view import PAGE_SIZES, page_count
+
+BUDGET_STEPS = 100
+
+
+def budget_step(low, high):
+    """A round step (a power of ten) that crosses the cost range in about BUDGET_STEPS clicks."""
+    return 10 ** max(0, math.floor(math.log10(max(high - low, 1) / BUDGET_STEPS)))
+
+
+# Load the whole dataset (comparisons span countries, so partitions do not help here)
+file_path = "All_country_data.csv"
+profiler.begin("compare_countries.py")
+with profiler.span("load data"):
+    index = load_index(file_path)
+df = index.all()
+
+st.title("Compare Programmes Across Countries")
+st.caption("Costs are converted to US dollars at approximate exchange rates (see cost_normalization.py).")
+memory_sidebar(index)
+
+# ---------------------------
+# 1. Learning Pathway (optional)
+with profiler.span("options Learning Pathway"):
+    lp_options = ["All Learning Pathways"] + df.unique("Learning_Pathway")
+selected_lp = st.selectbox("Learning Pathway", lp_options)
+if selected_lp == "All Learning Pathways":
+    selected_lp = None
+    df_lp = df
+else:
+    df_lp = df.eq("Learning_Pathway", selected_lp)
+
+# ---------------------------
+# 2. Countries (Australia and New Zealand are merged, as in the filter apps)
+with profiler.span("options Country"):
+    country_list = df_lp.unique("country")
+    if "Australia" in country_list or "New Zealand" in country_list:
+        country_list = [c for c in country_list if c not in ["Australia", "New Zealand"]]
+        country_list.append("Australia & New Zealand")
+selected_countries = st.multiselect("Countries", sorted(country_list), key="compare_countries")
+
+if not selected_countries:
+    st.write("Please select at least one Country to compare.")
+else:
+    df_countries = df_lp.isin("country", [v for c in selected_countries for v in country_values(c)])
+
+    # ---------------------------
+    # 3. Degrees (optional; long lists are searched server-side)
+    with profiler.span("options Degree"):
+        selected_degrees = st.session_state.get("compare_degrees", [])
+        degree_options = searchable_values(df_countries, "degree", "Degree", "compare_degrees",
+                                           keep=selected_degrees)
+    selected_degrees = st.multiselect("Degrees (leave empty for all)", degree_options, key="compare_degrees")
+
+    # ---------------------------
+    # 4. Budget in US dollars
+    with profiler.span("options Budget"):
+        min_cost, max_cost = df_countries.cost_range(NORMALIZED_COST)
+    budget = st.number_input("Budget (USD)", min_value=0, value=max_cost, step=budget_step(min_cost, max_cost))
+
+    page_size = st.selectbox("Rows per page", PAGE_SIZES)
+    with profiler.span("compare") as span:
+        first = compare_programmes(index, selected_countries, budget, selected_degrees, selected_lp,
+                                   page_size=page_size)
+        span.rows = first["total"]
+    st.write(f"Programmes within **{budget:,} USD**: {first['total']}")
+    st.dataframe({"Country": list(first["counts"]), "Programmes": list(first["counts"].values())})
+
+    pages = page_count(first["total"], page_size)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    result = first if page == 1 else compare_programmes(index, selected_countries, budget, selected_degrees,
+                                                        selected_lp, page=page, page_size=page_size)
+    st.caption(f"Cheapest first. Showing page {page} of {pages}.")
+    with profiler.span("serialize table") as span:
+        span.rows = len(result["rows"])
+        st.dataframe(result["rows"])
+
+profile_sidebar()
@@ -0,0 +1,75 @@
+"""
+Programme costs converted to US dollars, for comparing countries.
+
+USD_PER_UNIT holds approximate exchange rates. Rows whose country has no
+rate, or whose cost is not a number, get NaN and fall outside every budget.
+"""
+import numpy as np
+import pandas as pd
+
+NORMALIZED_COST = "cost_usd"
+DEFAULT_COST_COLUMN = "cost_int"
+# Countries whose programmes are priced in another column than DEFAULT_COST_COLUMN.
+COST_COLUMNS = {
+    "Indonesia": "cost",
+}
+CURRENCIES = {
+    "India": "INR",
+    "USA": "USD",
+    "United Kingdom": "GBP",
+    "Canada": "CAD",
+    "Hong Kong": "HKD",
+    "Hong-kong": "HKD",
+    "Vietnam": "VND",
+    "Australia": "AUD",
+    "New Zealand": "NZD",
+    "Bangladesh": "BDT",
+    "Philippines": "PHP",
+    "Malaysia": "MYR",
+    "Singapore": "SGD",
+    "Indonesia": "IDR",
+}
+# US dollars per unit of each currency (approximate, 2025).
+USD_PER_UNIT = {
+    "USD": 1.0,
+    "INR": 0.0116,
+    "GBP": 1.33,
+    "CAD": 0.72,
+    "HKD": 0.128,
+    "VND": 0.000038,
+    "AUD": 0.65,
+    "NZD": 0.58,
+    "BDT": 0.0082,
+    "PHP": 0.0173,
+    "MYR": 0.235,
+    "SGD": 0.77,
+    "IDR": 0.000061,
+}
+
+
+def cost_column(country):
+    return COST_COLUMNS.get(country, DEFAULT_COST_COLUMN)
+
+
+def usd_rate(country):
+    """US dollars per unit of `country`'s currency, or NaN when it is not known."""
+    currency = CURRENCIES.get(country)
+    return USD_PER_UNIT.get(currency, np.nan)
+
+
+def normalized_costs(df):
+    """Cost of every row of `df` in US dollars (float64, NaN when unpriced)."""
+    costs = np.full(len(df), np.nan)
+    if "country" not in df.columns:
+        return costs
+    codes, countries = pd.factorize(df["country"])
+    # Code -1 (no country) picks the trailing NaN rate.
+    rates = np.array([usd_rate(country) for country in countries] + [np.nan])[codes]
+    columns = np.array([cost_column(country) for country in countries] + [None], dtype=object)[codes]
+    for column in set(columns[codes >= 0]):
+        if column not in df.columns:
+            continue
+        uses = columns == column
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        costs[uses] = values[uses] * rates[uses]
+    return costs
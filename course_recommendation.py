@@ -0,0 +1,207 @@
+"""
+Course recommendations for a user at a college, and the batch job that
+computes them for every user and college.
+
+The "bin" rule (recom_user.py) picks a block of the college's ranking by
+the user's Similarity_Bin. The "rank" rule (recom_user_course.py) picks the
+two best degrees plus a random one chosen by Similarity_Rank. The batch job
+reads the precomputed rankings (degree_ranking.py) and writes one Parquet
+row per (user, college):
+
+    python course_recommendation.py --strategy bin --workers 8 --output recommendations.parquet
+
+Random picks are seeded per college (--seed), so the output does not depend
+on the number of workers.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from user_scores import BIN_EDGES
+
+NUM_COURSES = 3
+STRATEGIES = ("bin", "rank")
+COURSE_COLUMNS = [f"Course_{i + 1}" for i in range(NUM_COURSES)]
+# Colleges per task handed to a worker.
+COLLEGES_PER_TASK = 8
+# Seconds between progress lines.
+PROGRESS_EVERY = 2.0
+
+_worker = {}
+
+
+def bin_course_indices(n_degrees, similarity_bin, num_courses=NUM_COURSES):
+    """Positions in the ranking recommended for `similarity_bin` (the bin rule)."""
+    mapping = {i: list(range(max(0, n_degrees - (i + 1) * num_courses), n_degrees - i * num_courses))
+               for i in range(BIN_EDGES)}
+    indices = [i for i in mapping.get(similarity_bin, list(range(num_courses))) if 0 <= i < n_degrees]
+    # Short blocks are topped up from the top of the ranking.
+    while len(indices) < num_courses and len(indices) < n_degrees:
+        indices.append(len(indices))
+    return indices
+
+
+def by_bin(degrees, similarity_bin, num_courses=NUM_COURSES):
+    return [degrees[i] for i in bin_course_indices(len(degrees), similarity_bin, num_courses)]
+
+
+def by_rank(degrees, similarity_rank, choice=random.choice):
+    """The rank rule; `choice` picks the third course from a half of the ranking."""
+    top = degrees[:len(degrees) // 2]
+    bottom = degrees[len(degrees) // 2:]
+    courses = top[:2]
+    group = top if similarity_rank <= len(top) else bottom
+    if group:
+        courses.append(choice(group))
+    return courses
+
+
+def college_recommendations(degrees, bins, ranks, strategy, rng):
+    """
+    Courses of every user at a college with the ranked `degrees`: an array
+    of shape (users, NUM_COURSES), None where there are fewer courses.
+    """
+    degrees = np.asarray(degrees, dtype=object)
+    n = len(degrees)
+    if strategy == "bin":
+        # One row per bin value, then a lookup per user.
+        table = np.full((BIN_EDGES + 1, NUM_COURSES), None, dtype=object)
+        for similarity_bin in range(BIN_EDGES + 1):
+            indices = bin_course_indices(n, similarity_bin)
+            table[similarity_bin, :len(indices)] = degrees[indices]
+        return table[bins]
+
+    courses = np.full((len(ranks), NUM_COURSES), None, dtype=object)
+    half = n // 2
+    first = min(2, half)
+    courses[:, :first] = degrees[:first]
+    in_top = ranks <= half
+    size = np.where(in_top, half, n - half)
+    pick = np.where(in_top, 0, half) + np.floor(rng.random(len(ranks)) * size).astype(np.int64)
+    has_group = size > 0
+    courses[has_group, first] = degrees[pick[has_group]]
+    return courses
+
+
+def _init_worker(degree_path, model_name, users, strategy, seed):
+    from degree_ranking import load_rankings
+
+    _worker.update(rankings=load_rankings(degree_path, model_name), users=users, strategy=strategy, seed=seed)
+
+
+def _recommend(task):
+    """Arrow table of the recommendations of every user at the colleges of `task`."""
+    import pyarrow as pa
+
+    rankings, users = _worker["rankings"], _worker["users"]
+    user_ids, bins, ranks = users
+    frames = []
+    for position, (country, learning_pathway, name) in task:
+        degrees = rankings.college(country, learning_pathway, name)["Degree"].tolist()
+        rng = np.random.default_rng([_worker["seed"], position])
+        courses = college_recommendations(degrees, bins, ranks, _worker["strategy"], rng)
+        columns = {
+            "user_id": user_ids,
+            "country": pa.repeat(country, len(user_ids)),
+            "Learning_Pathway": pa.repeat(learning_pathway, len(user_ids)),
+            "name": pa.repeat(name, len(user_ids)),
+        }
+        for i, column in enumerate(COURSE_COLUMNS):
+            columns[column] = pa.array(courses[:, i], type=pa.string())
+        frames.append(pa.table(columns))
+    return pa.concat_tables(frames) if frames else None
+
+
+def _progress(done, total, rows, elapsed, end="\r"):
+    rate = rows / elapsed if elapsed else 0.0
+    eta = elapsed / done * (total - done) if done else 0.0
+    print(f"{done}/{total} colleges, {rows:,} rows, {rate:,.0f} rows/s, "
+          f"{elapsed:.0f} s elapsed, ~{eta:.0f} s left", end=end, file=sys.stderr, flush=True)
+
+
+def write_recommendations(tasks, n_colleges, out, init_args, workers):
+    """Run `tasks` on a pool of `workers` processes and stream their tables to `out`."""
+    import pyarrow.parquet as pq
+
+    start = time.perf_counter()
+    last = start
+    done = rows = 0
+    writer = None
+    tmp_path = out + ".tmp"
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        # A bounded window of tasks in flight, written in order.
+        pending = deque()
+        tasks = iter(tasks)
+        while True:
+            while len(pending) < 2 * workers:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.append((len(task), pool.submit(_recommend, task)))
+            if not pending:
+                break
+            count, future = pending.popleft()
+            table = future.result()
+            if table is not None:
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+                rows += table.num_rows
+            done += count
+            now = time.perf_counter()
+            if now - last >= PROGRESS_EVERY:
+                _progress(done, n_colleges, rows, now - start)
+                last = now
+    if writer is not None:
+        writer.close()
+        os.replace(tmp_path, out)
+    _progress(done, n_colleges, rows, time.perf_counter() - start, end="\n")
+    return rows
+
+
+def main():
+    import pyarrow as pa
+
+    from degree_encoder import backend_name, encoder_name
+    from degree_ranking import DEFAULT_PATH as DEGREE_PATH, MODEL_NAME, load_rankings
+    from user_scores import DEFAULT_PATH as SKILL_PATH, load_scores
+
+    parser = argparse.ArgumentParser(description="Recommend courses to every user at every college.")
+    parser.add_argument("--degrees", default=DEGREE_PATH, help="college degrees CSV (default: %(default)s)")
+    parser.add_argument("--skills", default=SKILL_PATH, help="user chakra scores CSV (default: %(default)s)")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="bin",
+                        help="bin (recom_user.py) or rank (recom_user_course.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--colleges-per-task", type=int, default=COLLEGES_PER_TASK)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the rank rule's random picks")
+    parser.add_argument("--output", default="recommendations.parquet")
+    args = parser.parse_args()
+
+    model_name = encoder_name(MODEL_NAME, backend_name())
+    rankings = load_rankings(args.degrees, model_name)
+    if rankings is None:
+        sys.exit(f"No current rankings for {args.degrees}: run `python degree_ranking.py {args.degrees}` first.")
+    users = load_scores(args.skills)
+    user_arrays = (pa.array(users["user_id"]), users["Similarity_Bin"].to_numpy(),
+                   users["Similarity_Rank"].to_numpy())
+    colleges = list(enumerate(rankings.colleges()))
+    tasks = [colleges[i:i + args.colleges_per_task] for i in range(0, len(colleges), args.colleges_per_task)]
+    print(f"{len(users):,} users x {len(colleges):,} colleges = {len(users) * len(colleges):,} rows, "
+          f"{args.workers} workers", file=sys.stderr)
+
+    start = time.perf_counter()
+    rows = write_recommendations(tasks, len(colleges), args.output,
+                                 (args.degrees, model_name, user_arrays, args.strategy, args.seed), args.workers)
+    seconds = time.perf_counter() - start
+    print(f"{rows:,} recommendations -> {args.output} in {seconds:.1f} s "
+          f"({rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Lazily loaded sentence encoder for the degree ranking apps.
+
+lazy_encoder() loads the model on its first encode() call, once per
+process. DEGREE_MODEL_BACKEND (or --backend) picks "torch" (default),
+"onnx" or "int8". Any backend but torch is part of the encoder's name, so it
+keys its own embedding cache and rankings.
+"""
+import os
+import threading
+import time
+
+ENV_VAR = "DEGREE_MODEL_BACKEND"
+DEFAULT_BACKEND = "torch"
+BACKENDS = ("torch", "onnx", "int8")
+
+_lock = threading.Lock()
+_encoders = {}
+
+
+def backend_name(backend=None):
+    """`backend`, else DEGREE_MODEL_BACKEND, else the default; checked against BACKENDS."""
+    backend = backend or os.environ.get(ENV_VAR) or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}, expected one of: {', '.join(BACKENDS)}")
+    return backend
+
+
+def encoder_name(model_name, backend):
+    return model_name if backend == DEFAULT_BACKEND else f"{model_name}@{backend}"
+
+
+def load_model(model_name, backend):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return SentenceTransformer(model_name)
+
+
+class LazyEncoder:
+    def __init__(self, model_name, backend):
+        self.model_name = model_name
+        self.backend = backend
+        self.name = encoder_name(model_name, backend)
+        self.model = None
+        # Seconds spent importing and loading the model, once it is loaded.
+        self.load_seconds = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.model is None:
+                start = time.perf_counter()
+                self.model = load_model(self.model_name, self.backend)
+                self.load_seconds = time.perf_counter() - start
+            return self.model
+
+    def encode(self, texts, **kwargs):
+        return self.load().encode(texts, **kwargs)
+
+
+def lazy_encoder(model_name, backend=None):
+    """The process-wide encoder of `model_name` on `backend` (see backend_name)."""
+    key = (model_name, backend_name(backend))
+    with _lock:
+        encoder = _encoders.get(key)
+        if encoder is None:
+            encoder = LazyEncoder(*key)
+            _encoders[key] = encoder
+        return encoder
@@ -0,0 +1,220 @@
+"""
+Precomputed degree rankings for the recommendation apps.
+
+Ranks the degrees of every college against REFERENCE_DEGREES, the same way
+the apps rank one college, and writes the result next to the CSV
+(india_usa_whole_data.rankings.parquet, keyed by the CSV signature, model
+and reference degrees). rank_matches() ranks a single college.
+
+    python degree_ranking.py [india_usa_whole_data.csv] [--batch-size 256] [--backend onnx]
+
+load_rankings() returns None when the file is missing or out of date, or
+without pyarrow.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+from programme_data import source_signature
+
+DEFAULT_PATH = "india_usa_whole_data.csv"
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Reference sorted list of engineering degrees (a lower index ranks higher).
+REFERENCE_DEGREES = [
+    "Computer Science Engineering (CSE)",
+    "Electronics and Communication Engineering (ECE)",
+    "Information Technology (IT)",
+    "Mechanical Engineering",
+    "Civil Engineering",
+    "Electrical Engineering",
+    "Chemical Engineering",
+    "Biotechnology/Biomedical Engineering",
+    "Aerospace/Aeronautical Engineering",
+    "Other Specialized Fields (e.g., Industrial, Agricultural, Metallurgical Engineering)"
+]
+# Degree types by keyword (case-insensitive), first match wins; others rank 4.
+TYPE_KEYWORDS = ["b.tech", "b.e", "diploma"]
+KEY_COLUMNS = ["country", "Learning_Pathway", "name"]
+RANKING_COLUMNS = ["Rank", "Degree", "Matched_Reference", "Type_Rank", "Similarity_Score"]
+METADATA_KEY = b"degree_ranking"
+# Degree strings handed to the embedding cache per call.
+BATCH_TEXTS = 4096
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def rankings_path(path):
+    return os.path.splitext(path)[0] + ".rankings.parquet"
+
+
+def type_ranks(degrees):
+    """Type rank of every degree: B.Tech 1, B.E 2, Diploma 3, anything else 4."""
+    lower = pd.Series(degrees, dtype=object).astype(str).str.lower()
+    matches = [lower.str.contains(keyword, regex=False).to_numpy() for keyword in TYPE_KEYWORDS]
+    return np.select(matches, np.arange(1, len(TYPE_KEYWORDS) + 1), len(TYPE_KEYWORDS) + 1)
+
+
+def best_matches(similarity):
+    """Index and similarity of the best reference for every row of `similarity`."""
+    match = similarity.argmax(axis=1)
+    return match, similarity[np.arange(len(similarity)), match]
+
+
+def ranking_order(match, score, type_rank, groups=None):
+    """
+    Positions of the ranked degrees, best first: by matched reference (lower
+    index first), degree type (B.Tech > B.E > Diploma > others), then
+    similarity (higher first); ties keep their order. Degrees whose best
+    similarity is 0 are left out. With `groups` (one code per degree), each
+    group is ranked on its own and the groups follow each other.
+    """
+    keep = np.flatnonzero(score != 0)
+    keys = [-score[keep], type_rank[keep], match[keep]]
+    if groups is not None:
+        keys.append(groups[keep])
+    # lexsort is stable and sorts by its last key first.
+    return keep[np.lexsort(keys)]
+
+
+def rank_matches(degrees, similarity, references=REFERENCE_DEGREES):
+    """
+    Ranking of `degrees` (the columns the apps display) from their similarity
+    to `references`, one row per degree.
+    """
+    degrees = np.asarray(degrees, dtype=object)
+    match, score = best_matches(np.asarray(similarity))
+    type_rank = type_ranks(degrees)
+    order = ranking_order(match, score, type_rank)
+    return pd.DataFrame({
+        "Rank": np.arange(1, len(order) + 1),
+        "Degree": degrees[order],
+        "Matched_Reference": np.asarray(references, dtype=object)[match[order]],
+        "Type_Rank": type_rank[order],
+        "Similarity_Score": score[order],
+    }, columns=RANKING_COLUMNS)
+
+
+def build_rankings(df, embeddings, references=REFERENCE_DEGREES, batch_texts=BATCH_TEXTS):
+    """
+    Ranking table of every (country, Learning_Pathway, name) in `df`.
+    `embeddings` is an EmbeddingCache (or anything with encode(texts)).
+    """
+    # A college's degrees in order of first appearance, as .unique() gives them.
+    offered = df[["country", "name", "degree"]].dropna().drop_duplicates()
+    codes, degrees = pd.factorize(offered["degree"])
+    vectors = [embeddings.encode(list(degrees[start:start + batch_texts]))
+               for start in range(0, len(degrees), batch_texts)]
+    vectors = np.concatenate(vectors) if vectors else np.empty((0, 1), dtype=np.float32)
+    match, score = best_matches(cosine_similarity(vectors, embeddings.encode(references)))
+    type_rank = type_ranks(degrees)
+
+    match, score, type_rank = match[codes], score[codes], type_rank[codes]
+    college = offered.groupby(["country", "name"], sort=False).ngroup().to_numpy()
+    order = ranking_order(match, score, type_rank, groups=college)
+    ranked = offered.iloc[order]
+    ranked = pd.DataFrame({
+        "country": ranked["country"].to_numpy(),
+        "name": ranked["name"].to_numpy(),
+        "Rank": ranked.groupby(["country", "name"], sort=False).cumcount().to_numpy() + 1,
+        "Degree": ranked["degree"].to_numpy(),
+        "Matched_Reference": np.asarray(references, dtype=object)[match[order]],
+        "Type_Rank": type_rank[order].astype(np.int64),
+        "Similarity_Score": score[order],
+    })
+    colleges = df[KEY_COLUMNS].dropna().drop_duplicates()
+    return colleges.merge(ranked, on=["country", "name"])[KEY_COLUMNS + RANKING_COLUMNS]
+
+
+def write_rankings(table, out, metadata):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow = pa.Table.from_pandas(table, preserve_index=False)
+    arrow = arrow.replace_schema_metadata({**(arrow.schema.metadata or {}),
+                                           METADATA_KEY: json.dumps(metadata).encode()})
+    tmp_path = out + ".tmp"
+    pq.write_table(arrow, tmp_path)
+    os.replace(tmp_path, out)
+
+
+def rankings_metadata(path, model_name, references=REFERENCE_DEGREES):
+    return {"signature": source_signature(path), "model": model_name, "references": list(references)}
+
+
+class CollegeRankings:
+    """Precomputed rankings, looked up by (country, Learning_Pathway, name)."""
+
+    def __init__(self, table):
+        self.table = table
+        self._rows = table.groupby(KEY_COLUMNS, sort=False).indices
+
+    def __len__(self):
+        return len(self._rows)
+
+    def colleges(self):
+        """(country, Learning_Pathway, name) of every college with ranked degrees."""
+        return list(self._rows)
+
+    def college(self, country, learning_pathway, name):
+        """Ranked degrees of a college (empty when none of its degrees matched)."""
+        rows = self._rows.get((country, learning_pathway, name), [])
+        return self.table[RANKING_COLUMNS].iloc[rows].reset_index(drop=True)
+
+
+def load_rankings(path=DEFAULT_PATH, model_name=MODEL_NAME, references=REFERENCE_DEGREES):
+    """The rankings precomputed for the current CSV, or None (see the module docstring)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    out = rankings_path(path)
+    try:
+        expected = rankings_metadata(path, model_name, references)
+    except OSError:
+        return None
+    with _lock:
+        cached = _loaded.get(out)
+        if cached is not None and cached[0] == expected:
+            return cached[1]
+        try:
+            metadata = json.loads((pq.read_schema(out).metadata or {}).get(METADATA_KEY, b"null"))
+            if metadata != expected:
+                return None
+            rankings = CollegeRankings(pq.read_table(out).to_pandas())
+        except (OSError, ValueError):
+            return None
+        _loaded[out] = (expected, rankings)
+        return rankings
+
+
+def main():
+    from degree_encoder import BACKENDS, lazy_encoder
+    from embedding_cache import open_cache
+
+    parser = argparse.ArgumentParser(description="Precompute the degree ranking of every college.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--batch-size", type=int, default=256, help="sentences per model forward pass")
+    parser.add_argument("--backend", choices=BACKENDS, help="encoder backend (default: $DEGREE_MODEL_BACKEND or torch)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = pd.read_csv(args.path, usecols=["name", "country", "Learning_Pathway", "degree"])
+    model = lazy_encoder(MODEL_NAME, args.backend)
+    embeddings = open_cache(model.name, lambda texts: model.encode(texts, batch_size=args.batch_size))
+    table = build_rankings(df, embeddings)
+    out = rankings_path(args.path)
+    write_rankings(table, out, rankings_metadata(args.path, model.name))
+    print(f"{table.groupby(KEY_COLUMNS).ngroups} colleges, {len(table)} ranked degrees -> {out}")
+    print(f"embeddings: {embeddings.misses} encoded, {embeddings.hits} from the cache; "
+          f"{time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
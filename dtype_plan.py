@@ -0,0 +1,126 @@
+"""
+Explicit dtypes for the programme dataset on the heap load path.
+
+DTYPE_PLAN maps each known column to "category", "intern" (categorical, or
+interned strings for high-cardinality names) or "numeric" (downcast only
+when lossless). Other columns are left alone.
+
+    python dtype_plan.py All_country_data.csv
+
+prints the per-column memory before and after the plan.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+DTYPE_PLAN = {
+    "Learning_Pathway": "category",
+    "country": "category",
+    "state": "category",
+    "institution_type": "category",
+    "degree_level": "category",
+    "degree": "intern",
+    "name": "intern",
+    "cost": "numeric",
+    "cost_int": "numeric",
+}
+MAX_INTERN_RATIO = 0.5
+
+
+def _interned(series):
+    if series.dtype != object:
+        # Arrow-backed strings hold no per-row Python objects to share.
+        return series
+    pool = {}
+    return series.map(lambda value: pool.setdefault(value, sys.intern(value))
+                      if isinstance(value, str) else value)
+
+
+def _downcast(series):
+    numbers = pd.to_numeric(series, errors="coerce")
+    if numbers.isna().sum() != series.isna().sum():
+        # Some values are not numbers; converting would lose them.
+        return series
+    values = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+        return pd.to_numeric(numbers, downcast="integer")
+    narrow = values.astype(np.float32)
+    if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+        return pd.Series(narrow, index=series.index, name=series.name)
+    return numbers.astype(np.float64)
+
+
+def convert_column(series, kind):
+    """`series` converted according to a DTYPE_PLAN kind."""
+    if kind == "numeric":
+        return _downcast(series)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if kind == "category" or (
+            kind == "intern" and series.nunique() <= MAX_INTERN_RATIO * max(1, len(series))):
+        return series.astype("category")
+    return _interned(series)
+
+
+def apply_dtype_plan(df, plan=DTYPE_PLAN):
+    """`df` with the planned dtypes; other columns are shared with `df`, not copied."""
+    converted = {column: convert_column(df[column], kind)
+                 for column, kind in plan.items() if column in df.columns}
+    return df.assign(**converted)
+
+
+def extend_frame(df, tail, plan=DTYPE_PLAN):
+    """
+    `df` (already planned) with the rows of `tail` appended.
+
+    Categories new in the tail are merged into the existing (sorted) ones
+    first, so the columns stay categorical instead of falling back to
+    object in pd.concat, and still sort like the strings they replace.
+    """
+    tail = apply_dtype_plan(tail, plan)
+    head = {}
+    for column in df.columns:
+        old = df[column]
+        if not isinstance(old.dtype, pd.CategoricalDtype) or column not in tail.columns:
+            continue
+        new = tail[column].astype(object)
+        categories = old.cat.categories
+        added = pd.Index(new.dropna().unique()).difference(categories)
+        if len(added):
+            categories = categories.append(added).sort_values()
+            head[column] = old.cat.set_categories(categories)
+        tail[column] = pd.Categorical(new, categories=categories)
+    if head:
+        df = df.assign(**head)
+    return pd.concat([df, tail], ignore_index=True)
+
+
+def memory_report(before, after):
+    """Per-column bytes and dtypes before and after the plan, with a total row."""
+    report = pd.DataFrame({
+        "dtype before": before.dtypes.astype(str),
+        "bytes before": before.memory_usage(index=False, deep=True),
+        "dtype after": after.dtypes.astype(str),
+        "bytes after": after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = ["", report["bytes before"].sum(), "", report["bytes after"].sum()]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory report for the programme dtype plan.")
+    parser.add_argument("path", nargs="?", default="All_country_data.csv")
+    args = parser.parse_args()
+    before = pd.read_csv(args.path)
+    after = apply_dtype_plan(before)
+    report = memory_report(before, after)
+    for column in ("bytes before", "bytes after"):
+        report[column] = (report[column] / 2 ** 20).map("{:.2f} MB".format)
+    print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Persistent embedding cache for the degree ranking apps.
+
+Embeddings are stored on disk, keyed by the model name and a hash of the
+whitespace-normalized text:
+
+    embedding_cache/all-MiniLM-L6-v2/
+        meta.json       model name and embedding dimension
+        vectors.f32     float32 rows, memory-mapped
+        keys.txt        hex text hash of each row, in row order
+
+EmbeddingCache.encode() only encodes texts not seen before by any process.
+Vectors are appended before their keys, under a file lock where fcntl is
+available; rows without a key are ignored, and cut off by the next append.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within a process.
+    fcntl = None
+
+DEFAULT_DIRECTORY = "embedding_cache"
+
+_lock = threading.Lock()
+_caches = {}
+
+
+def text_key(text):
+    """Hash of `text` with whitespace runs collapsed and the ends stripped."""
+    return hashlib.sha1(" ".join(str(text).split()).encode("utf-8")).hexdigest()
+
+
+def model_slug(model_name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", model_name).strip("-")
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, encode, directory=DEFAULT_DIRECTORY):
+        """
+        encode(texts) -> array of shape (len(texts), dim) computes missing
+        embeddings, e.g. SentenceTransformer(model_name).encode.
+        """
+        self.model_name = model_name
+        self.encode_fn = encode
+        self.path = os.path.join(directory, model_slug(model_name))
+        self.hits = 0
+        self.misses = 0
+        self.dim = None
+        self._keys = {}
+        self._lines = 0
+        self._keys_read = 0
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _refresh(self):
+        """Pick up rows appended since the last refresh (by this or another process)."""
+        try:
+            with open(self._file("meta.json")) as f:
+                self.dim = json.load(f)["dim"]
+            with open(self._file("keys.txt"), "rb") as f:
+                f.seek(self._keys_read)
+                data = f.read()
+        except (OSError, ValueError, KeyError):
+            return
+        # Ignore a line that is still being written.
+        data = data[:data.rfind(b"\n") + 1]
+        self._keys_read += len(data)
+        for key in data.decode("ascii").split():
+            # Without a file lock a key can be appended twice; the first row wins.
+            self._keys.setdefault(key, self._lines)
+            self._lines += 1
+        # Rows past the last key were written by an append that has not (or never) finished.
+        rows = min(self._lines, os.path.getsize(self._file("vectors.f32")) // (4 * self.dim))
+        if rows != len(self._vectors):
+            self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r",
+                                      shape=(rows, self.dim)) if rows else self._vectors
+
+    def _truncate(self, name, size):
+        try:
+            if os.path.getsize(self._file(name)) > size:
+                os.truncate(self._file(name), size)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, keys, vectors):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file("keys.lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._file("meta.json"), "w") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+            # Another process may have added some of them meanwhile.
+            new = [i for i, key in enumerate(keys) if key not in self._keys]
+            if new:
+                # Drop what an interrupted append left behind, so the rows stay aligned with the keys.
+                self._truncate("vectors.f32", self._lines * 4 * self.dim)
+                self._truncate("keys.txt", self._keys_read)
+                with open(self._file("vectors.f32"), "ab") as f:
+                    f.write(np.ascontiguousarray(vectors[new], dtype=np.float32).tobytes())
+                with open(self._file("keys.txt"), "a") as f:
+                    f.write("".join(f"{keys[i]}\n" for i in new))
+            self._refresh()
+
+    def encode(self, texts):
+        """Embeddings of `texts` (float32, one row per text), encoding only unseen texts."""
+        texts = [str(text) for text in texts]
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            missing = {key: text for key, text in zip(keys, texts) if key not in self._keys}
+            if missing:
+                self._refresh()
+                missing = {key: text for key, text in missing.items() if key not in self._keys}
+            if missing:
+                self.misses += len(missing)
+                vectors = np.asarray(self.encode_fn(list(missing.values())), dtype=np.float32)
+                self._append(list(missing), vectors.reshape(len(missing), -1))
+            self.hits += len(keys) - len(missing)
+            if not keys:
+                return np.empty((0, self.dim or 0), dtype=np.float32)
+            rows = np.fromiter((self._keys[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.array(self._vectors[rows])
+
+
+def open_cache(model_name, encode, directory=DEFAULT_DIRECTORY):
+    """
+    The process-wide cache for `model_name`, so Streamlit reruns reuse its
+    key table; `encode` replaces the one it was created with.
+    """
+    key = (os.path.abspath(directory), model_name)
+    with _lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(model_name, encode, directory)
+            _caches[key] = cache
+        cache.encode_fn = encode
+        return cache
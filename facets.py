@@ -0,0 +1,155 @@
+"""
+Facet counts for the filter dropdowns.
+
+FacetEngine counts every indexed column of a slice in one bincount over the
+index's stacked codes and keeps the counts in an LRU keyed by the slice's
+filter prefix.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+class Facets:
+    """
+    Sorted options and counts of every indexed column for one slice.
+
+    Other per-slice aggregates (such as the cost-sorted rows behind the cost
+    slider) are memoized alongside through derived(), so they share the
+    slice's LRU entry.
+    """
+
+    def __init__(self, total, counts):
+        self.total = total
+        # counts: {column: {value: count}}, only values present in the slice.
+        self.counts = counts
+        self._options = {}
+        self._derived = {}
+
+    def value_counts(self, column):
+        return self.counts[column]
+
+    def options(self, column):
+        options = self._options.get(column)
+        if options is None:
+            options = sorted(self.counts[column])
+            self._options[column] = options
+        return options
+
+    def derived(self, key, compute):
+        value = self._derived.get(key)
+        if value is None:
+            value = compute()
+            self._derived[key] = value
+        return value
+
+    def merged(self, other):
+        """New facets with the counts of `other` (facets of appended rows) added to these."""
+        counts = {}
+        for column, column_counts in self.counts.items():
+            merged = dict(column_counts)
+            for value, count in other.counts.get(column, {}).items():
+                merged[value] = merged.get(value, 0) + count
+            counts[column] = merged
+        # Derived aggregates hold row ids of the slice, which has grown, so they are not kept.
+        return Facets(self.total + other.total, counts)
+
+
+class FacetEngine:
+    def __init__(self, index, max_entries=DEFAULT_MAX_ENTRIES, stacked=None):
+        self.index = index
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._names = list(index.columns)
+        # Give every column its own code range so one bincount covers all of them.
+        sizes = [len(index.columns[name].values) for name in self._names]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.stacked = self._codes(0) if stacked is None else stacked
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _codes(self, start):
+        """Rows of the stacked code matrix from `start` on."""
+        stacked = np.empty((self.index.n_rows - start, len(self._names)), dtype=np.int32)
+        for i, name in enumerate(self._names):
+            stacked[:, i] = self.index.columns[name].codes[start:] + self._offsets[i]
+        return stacked
+
+    def compute(self, rows):
+        """Count every indexed column over `rows` (None for all rows) in one pass."""
+        stacked = self.stacked if rows is None else self.stacked[rows]
+        totals = np.bincount(stacked.ravel(), minlength=int(self._offsets[-1]))
+        counts = {}
+        for i, name in enumerate(self._names):
+            values = self.index.columns[name].values
+            column_totals = totals[self._offsets[i]:self._offsets[i + 1]]
+            # Code 0 is the missing-value bucket, which the dropdowns never list.
+            counts[name] = {values[code]: int(column_totals[code]) for code in np.flatnonzero(column_totals) if code > 0}
+        return Facets(len(stacked), counts)
+
+    def peek(self, prefix):
+        """Cached facets for `prefix`, or None; never computes anything."""
+        if prefix is None:
+            return None
+        with self._lock:
+            return self._cache.get(prefix)
+
+    def facets(self, prefix, get_rows):
+        """
+        Facets for a slice, memoized by its normalized filter prefix.
+
+        `get_rows` returns the slice's row ids and is only called on a miss,
+        so a cached prefix is answered without evaluating its filters. A
+        prefix of None marks a slice that cannot be keyed (for example one
+        narrowed by an anonymous boolean mask); it is counted without caching.
+        """
+        if prefix is None:
+            return self.compute(get_rows())
+        with self._lock:
+            facets = self._cache.get(prefix)
+            if facets is not None:
+                self._cache.move_to_end(prefix)
+                self.hits += 1
+                return facets
+            self.misses += 1
+        facets = self.compute(get_rows())
+        with self._lock:
+            self._cache[prefix] = facets
+            self._cache.move_to_end(prefix)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return facets
+
+    def extended(self, index, start):
+        """
+        A new engine for `index`, this engine's index with rows appended from
+        `start` on. The stacked codes are extended (rebuilt when appended
+        values shifted the per-column code ranges) and the appended rows that
+        match each cached prefix are added to its counts; prefixes that
+        cannot be re-evaluated are dropped. This engine is left unchanged.
+        """
+        engine = FacetEngine(index, self.max_entries, stacked=self.stacked)
+        if np.array_equal(engine._offsets, self._offsets):
+            engine.stacked = np.concatenate([self.stacked, engine._codes(start)])
+        else:
+            engine.stacked = engine._codes(0)
+        engine.hits, engine.misses = self.hits, self.misses
+        rows = np.arange(start, index.n_rows)
+        with self._lock:
+            cached = list(self._cache.items())
+        for prefix, facets in cached:
+            matched = index.match(prefix, rows)
+            if matched is not None:
+                engine._cache[prefix] = facets if len(matched) == 0 else facets.merged(engine.compute(matched))
+        return engine
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,84 @@
+"""
+Per-country filter plans for the filter apps.
+
+A plan is the ordered list of stages shown once a country is chosen, e.g.
+state -> institution_type -> degree_level for India; filter_ui.run_plan
+renders it.
+"""
+from collections import namedtuple
+
+# kind is "choice" for a categorical dropdown and "cost" for the cost slider.
+# gate adds "to continue" to the prompt, as the State dropdowns always did.
+Stage = namedtuple("Stage", ["kind", "column", "label", "article", "gate"])
+
+ALL = "ALL"
+
+STATE = Stage("choice", "state", "State", "a", True)
+INSTITUTION_TYPE = Stage("choice", "institution_type", "Institution Type", "an", False)
+DEGREE_LEVEL = Stage("choice", "degree_level", "Degree Level", "a", False)
+DEGREE = Stage("choice", "degree", "Degree", "a", False)
+COST = Stage("cost", "cost_int", "Cost Range", "a", False)
+# Indonesian programmes are priced in the `cost` column instead of `cost_int`.
+COST_IDR = Stage("cost", "cost", "Cost Range", "a", False)
+
+# Options that stand for several values of the country column.
+COUNTRY_GROUPS = {
+    "Australia & New Zealand": ["Australia", "New Zealand"],
+}
+
+# filter_all.py (and the headless API, which shares its semantics).
+FILTER_ALL_PLANS = {
+    "Indonesia": [DEGREE, COST_IDR],
+    "India": [STATE, INSTITUTION_TYPE, DEGREE_LEVEL],
+    "USA": [STATE, DEGREE],
+    "United Kingdom": [DEGREE_LEVEL, COST],
+    "Canada": [DEGREE_LEVEL, COST],
+    "Hong-kong": [DEGREE, COST],
+    "Vietnam": [DEGREE, COST],
+    "Australia & New Zealand": [STATE, DEGREE_LEVEL, COST],
+    "Bangladesh": [STATE, INSTITUTION_TYPE, COST],
+    "Philippines": [INSTITUTION_TYPE, COST],
+    "Malaysia": [INSTITUTION_TYPE, COST],
+    "Singapore": [INSTITUTION_TYPE, COST],
+}
+
+# final_fiter.py: cost before degree for Indonesia, degree before cost for the UK.
+FINAL_FILTER_PLANS = {
+    "Indonesia": [COST_IDR, DEGREE],
+    "India": [STATE, INSTITUTION_TYPE, DEGREE_LEVEL],
+    "USA": [STATE, DEGREE],
+    "United Kingdom": [DEGREE, COST],
+    "Canada": [DEGREE_LEVEL, COST],
+    "Hong Kong": [DEGREE, COST],
+    "Vietnam": [DEGREE, COST],
+    "Australia & New Zealand": [STATE, DEGREE_LEVEL, COST],
+    "Bangladesh": [STATE, INSTITUTION_TYPE, COST],
+    "Philippines": [INSTITUTION_TYPE, COST],
+    "Malaysia": [INSTITUTION_TYPE, COST],
+    "Singapore": [INSTITUTION_TYPE, COST],
+}
+
+# Filter_all_mp4.py
+MP4_PLANS = {
+    "Indonesia": [COST_IDR, DEGREE],
+    "India": [STATE, INSTITUTION_TYPE, DEGREE_LEVEL],
+    "USA": [STATE, DEGREE],
+    "United Kingdom": [DEGREE, COST],
+    "Canada": [DEGREE, COST],
+    "Australia & New Zealand": [STATE, DEGREE, COST],
+    "Bangladesh": [STATE, DEGREE, COST],
+    "Philippines": [DEGREE, COST],
+}
+
+
+def country_values(selected_country):
+    """Values of the country column behind a Country dropdown option."""
+    return COUNTRY_GROUPS.get(selected_country, [selected_country])
+
+
+def prompt(stage, multiple=False):
+    """The message shown while a stage has nothing selected."""
+    suffix = " to continue" if stage.gate else ""
+    if multiple:
+        return f"Please select at least one {stage.label}{suffix}."
+    return f"Please select {stage.article} {stage.label}{suffix}."
@@ -0,0 +1,276 @@
+"""
+Streamlit rendering of the filter plans in filter_plan.py.
+
+run_plan draws a country's stages one after another over a lazy
+ProgrammeSlice: dropdown counts come from the facet cache, each selection
+only records a predicate, and the rows are evaluated once, when the final
+table is shown.
+"""
+import heapq
+import sys
+
+import streamlit as st
+
+import profiler
+from filter_plan import ALL, prompt
+from programme_data import dtype_report
+from programme_index import ProgrammeIndex
+from result_export import FORMATS, export_file, export_formats, file_name
+from result_view import PAGE_SIZES, page_count, page_frame
+
+ORIGINAL_ORDER = "(original order)"
+RESULT_ROWS_KEY = "result_row_bytes"
+FLAME_WIDTH = 30
+# Filters that name an export file, in order.
+EXPORT_NAME_COLUMNS = ["Learning_Pathway", "country"]
+# Columns whose dropdowns get a search box once they have more than
+# SEARCH_THRESHOLD options; at most SEARCH_LIMIT options are then shipped.
+SEARCHABLE_COLUMNS = ["degree"]
+SEARCH_THRESHOLD = 100
+SEARCH_LIMIT = 100
+
+
+def _megabytes(n_bytes):
+    return f"{n_bytes / 2 ** 20:.1f} MB"
+
+
+def _process_memory():
+    """Resident memory split into file-backed (mapped) and anonymous pages; Linux only."""
+    fields = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssFile", "RssAnon"):
+                    fields[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return fields
+
+
+def _process_rss():
+    process = _process_memory()
+    if process:
+        st.write(f"Process RSS: {_megabytes(process.get('VmRSS', 0))} "
+                 f"({_megabytes(process.get('RssFile', 0))} file-backed, "
+                 f"{_megabytes(process.get('RssAnon', 0))} private)")
+
+
+def memory_sidebar(index):
+    """Sidebar report of the shared dataset footprint and this session's own overhead."""
+    with profiler.span("memory panel"):
+        if isinstance(index, ProgrammeIndex):
+            _memory_sidebar(index)
+        else:
+            _partition_sidebar(index)
+
+
+def _partition_sidebar(store):
+    with st.sidebar.expander("Memory"):
+        st.write(f"Dataset (partitioned): {store.n_rows} rows in {len(store.partitions)} "
+                 f"Learning Pathway/country files")
+        loaded = store.loaded()
+        st.write(f"Loaded: {len(loaded)} of at most {store.max_loaded} selections "
+                 f"({store.hits} hits, {store.misses} loads)")
+        for (learning_pathway, countries), index in reversed(loaded):
+            frame_bytes = int(index.df.memory_usage(index=False).sum())
+            # A single pair is a view of its mapped file; merged pairs are copied to the heap.
+            kind = "memory-mapped" if len(countries) == 1 else "heap"
+            st.write(f"- {learning_pathway} / {' & '.join(countries)}: {index.n_rows} rows, "
+                     f"{_megabytes(frame_bytes)} {kind}, index {_megabytes(index.memory_usage()['heap'])} heap")
+        _process_rss()
+
+
+def _memory_sidebar(index):
+    frame_bytes = int(index.df.memory_usage(index=False).sum())
+    usage = index.memory_usage()
+    with st.sidebar.expander("Memory"):
+        kind = "memory-mapped, shared" if index.shared else "process heap"
+        st.write(f"Dataset ({kind}): {_megabytes(frame_bytes)}")
+        report = None if index.shared else dtype_report()
+        if report is not None:
+            before, after = report.loc["total", ["bytes before", "bytes after"]]
+            st.write(f"Dtype plan: {_megabytes(before)} as read, {_megabytes(after)} after "
+                     f"categoricals and downcasts")
+        st.write(f"Index: {_megabytes(usage['mapped'])} mapped, {_megabytes(usage['heap'])} heap")
+        facets = index.facets
+        st.write(f"Facet cache: {len(facets)} slices ({facets.hits} hits, {facets.misses} misses)")
+        results = index.results
+        st.write(f"Result cache: {len(results)} selections, {_megabytes(results.nbytes)} of "
+                 f"{_megabytes(results.max_bytes)} ({results.hits} hits, {results.misses} misses, "
+                 f"{results.evictions} evicted)")
+        _process_rss()
+        session_bytes = sum(getattr(value, "nbytes", None) or sys.getsizeof(value)
+                            for value in st.session_state.to_dict().values())
+        st.write(f"This session: {_megabytes(session_bytes)} "
+                 f"(widget state plus {_megabytes(st.session_state.get(RESULT_ROWS_KEY, 0))} of result row ids)")
+
+
+def profile_sidebar():
+    """
+    Finish profiling this rerun and show its steps in the sidebar.
+
+    Each line is one step, indented under the step that contains it, with a
+    bar proportional to its share of the whole rerun. Does nothing unless
+    profiling is enabled (see profiler.py).
+    """
+    rerun = profiler.finish()
+    if rerun is None:
+        return
+    total = rerun.total or 1e-9
+    lines = []
+    for span in rerun.spans:
+        bar = "█" * max(1, round(FLAME_WIDTH * span.seconds / total))
+        rows = "" if span.rows is None else f"  {span.rows} rows"
+        lines.append(f"{'  ' * span.depth}{span.name:<{32 - 2 * span.depth}} "
+                     f"{span.seconds * 1000:8.1f} ms {bar}{rows}")
+    with st.sidebar.expander(f"Profile: last rerun {rerun.total * 1000:.1f} ms"):
+        st.code("\n".join(lines) or "(no steps recorded)", language=None)
+
+
+def show_count(label, df_slice):
+    """Write "Data points after <label> selection: N", timing the evaluation it triggers."""
+    with profiler.span(f"stage {label}") as span:
+        rows = len(df_slice)
+        span.rows = rows
+    st.write(f"Data points after {label} selection: {rows}")
+
+
+def searchable_values(df_slice, column, label, key=None, keep=()):
+    """
+    Values of `column` to offer in a dropdown over `df_slice`.
+
+    Short lists come back in full and sorted, as before. For long degree
+    lists a search box is shown above the dropdown and only the best
+    matches (before anything is typed, the most common values) are sent to
+    the browser. Values in `keep`, i.e. already selected, are always kept.
+    """
+    values = df_slice.unique(column)
+    if column not in SEARCHABLE_COLUMNS or len(values) <= SEARCH_THRESHOLD:
+        return values
+    counts = df_slice.value_counts(column)
+    query = st.text_input(f"Search {label}", key=None if key is None else f"{key}_search",
+                          placeholder="Type part of the name")
+    with profiler.span(f"search {label}"):
+        if query.strip():
+            matches = [value for value, _ in df_slice.search(column, query, SEARCH_LIMIT)]
+        else:
+            # Most common first; ties by name, so the list does not depend on row order.
+            matches = [value for value, _ in heapq.nsmallest(SEARCH_LIMIT, counts.items(),
+                                                             key=lambda item: (-item[1], str(item[0])))]
+    st.caption(f"Showing {len(matches)} of {len(values)} {label} options.")
+    shown = set(matches)
+    return matches + [value for value in keep if value not in shown and value in counts]
+
+
+def placeholder(stage):
+    """Disabled stand-in for a stage that cannot be used yet."""
+    if stage.kind == "cost":
+        st.slider("Select Cost Range", min_value=0, max_value=1, value=(0, 1), disabled=True)
+    else:
+        st.selectbox(f"Select {stage.label}", [f"Select {stage.label}"], disabled=True)
+
+
+def cost_slider(df_slice, column):
+    with profiler.span("options Cost Range"):
+        min_cost, max_cost = df_slice.cost_range(column)
+    if min_cost >= max_cost:
+        st.write(f"Cost is fixed at {min_cost}")
+        return min_cost, max_cost
+    return st.slider("Select Cost Range", min_value=min_cost, max_value=max_cost, value=(min_cost, max_cost))
+
+
+def show_results(df_slice):
+    """
+    Paged replacement for st.dataframe(df_slice.frame()).
+
+    Only the current page of the chosen columns is sent to the browser;
+    sorting happens on the server, over the whole slice.
+    """
+    with profiler.span("results"):
+        _show_results(df_slice)
+
+
+def _show_results(df_slice):
+    total = len(df_slice)
+    columns = list(df_slice.index.df.columns)
+    rows = df_slice.rows
+    st.session_state[RESULT_ROWS_KEY] = 0 if rows is None else rows.nbytes
+    with st.expander("Table options"):
+        shown = st.multiselect("Columns", columns, default=columns)
+        sort_by = st.selectbox("Sort by", [ORIGINAL_ORDER] + columns)
+        ascending = st.checkbox("Ascending", value=True)
+        page_size = st.selectbox("Rows per page", PAGE_SIZES)
+    pages = page_count(total, page_size)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * page_size
+    st.caption(f"Showing rows {min(start + 1, total)}-{min(start + page_size, total)} of {total}")
+    with profiler.span("sort and page"):
+        frame = page_frame(df_slice, page, page_size, shown or columns,
+                           None if sort_by == ORIGINAL_ORDER else sort_by, ascending)
+    with profiler.span("serialize table") as span:
+        span.rows = len(frame)
+        st.dataframe(frame)
+    export_button(df_slice, shown or columns, None if sort_by == ORIGINAL_ORDER else sort_by, ascending)
+
+
+def _export_label(df_slice):
+    filters = dict(f for f in df_slice.filters or () if len(f) == 2)
+    parts = [" ".join(sorted(map(str, filters[column]))) for column in EXPORT_NAME_COLUMNS if column in filters]
+    return "_".join(parts)
+
+
+def export_button(df_slice, columns, sort_by=None, ascending=True):
+    """
+    Download button for the whole slice as CSV or Parquet.
+
+    The file is only written when the button is clicked, chunk by chunk from
+    the slice's row ids (see result_export.py), with the table's columns
+    and order.
+    """
+    with st.expander("Download"):
+        fmt = st.radio("Format", export_formats(), horizontal=True)
+        st.download_button(
+            f"Download {len(df_slice)} rows",
+            data=lambda: export_file(df_slice, fmt, columns, sort_by, ascending),
+            file_name=file_name(_export_label(df_slice), fmt),
+            mime=FORMATS[fmt][0],
+            on_click="ignore",
+        )
+
+
+def run_plan(plan, df_slice, choose, placeholders=True, multiple=False):
+    """
+    Render the stages of `plan` over `df_slice` and show the resulting table.
+
+    choose(stage, df_slice) draws the stage's widget and returns None (or an
+    empty list) while nothing is selected, ALL to keep every row, a single
+    value, or a list of values. Returns the final slice, or None while the
+    user still has a stage to fill in.
+    """
+    for i, stage in enumerate(plan):
+        if stage.kind == "cost":
+            if df_slice.empty:
+                st.write("No data available for cost selection.")
+                return None
+            low, high = cost_slider(df_slice, stage.column)
+            df_slice = df_slice.cost_between(stage.column, low, high)
+        else:
+            with profiler.span(f"options {stage.label}"):
+                selected = choose(stage, df_slice)
+            if selected is None or (isinstance(selected, list) and not selected):
+                st.write(prompt(stage, multiple))
+                if placeholders:
+                    for later in plan[i + 1:]:
+                        placeholder(later)
+                return None
+            if isinstance(selected, list):
+                if ALL not in selected:
+                    df_slice = df_slice.isin(stage.column, selected)
+            elif selected != ALL:
+                df_slice = df_slice.eq(stage.column, selected)
+        show_count(stage.label, df_slice)
+    show_results(df_slice)
+    return df_slice
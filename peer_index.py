@@ -0,0 +1,189 @@
+"""
+"Students like you": the users whose chakra profile is closest to a user's.
+
+PeerIndex answers top-k cosine similarity queries with a KD-tree over the
+unit-length score vectors. load_peer_index() keeps it in
+skill_score_data.peers.pkl, keyed by the CSV signature. Users whose scores
+are all zero or missing are left out. Once the CSV has a CHOICE_COLUMN,
+peers() returns it for every peer.
+
+    python peer_index.py skill_score_data.csv --k 10 --output peers.parquet
+"""
+import argparse
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from programme_data import source_signature
+from user_scores import CHUNK_ROWS, DEFAULT_PATH, SKILL_COLUMNS, normalize_rows
+
+DEFAULT_K = 5
+# Column of skill_score_data.csv holding the college a user chose, if any.
+CHOICE_COLUMN = "college"
+LEAF_SIZE = 40
+# Users per batch query of the batch job.
+QUERY_ROWS = 100_000
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def peers_path(path):
+    return os.path.splitext(path)[0] + ".peers.pkl"
+
+
+def read_vectors(path, chunk_rows=CHUNK_ROWS):
+    """user_ids, unit-length chakra vectors and CHOICE_COLUMN (or None) of every user."""
+    has_choices = CHOICE_COLUMN in pd.read_csv(path, nrows=0).columns
+    columns = ["user_id"] + SKILL_COLUMNS + ([CHOICE_COLUMN] if has_choices else [])
+    user_ids, vectors, choices = [], [], []
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+        user_ids.append(chunk["user_id"].to_numpy())
+        vectors.append(normalize_rows(chunk[SKILL_COLUMNS].to_numpy(dtype=np.float64)))
+        if has_choices:
+            choices.append(chunk[CHOICE_COLUMN].to_numpy(dtype=object))
+    if not user_ids:
+        # A header without rows.
+        user_ids, vectors = [np.empty(0, dtype=np.int64)], [np.empty((0, len(SKILL_COLUMNS)))]
+        choices = [np.empty(0, dtype=object)]
+    user_ids, vectors = np.concatenate(user_ids), np.concatenate(vectors)
+    choices = np.concatenate(choices) if has_choices else None
+    # All-zero or missing scores have no direction; those users neither have nor are peers.
+    scored = np.isfinite(vectors).all(axis=1) & vectors.any(axis=1)
+    return user_ids[scored], vectors[scored], choices[scored] if has_choices else None
+
+
+class PeerIndex:
+    def __init__(self, user_ids, tree, choices=None):
+        self.user_ids = user_ids
+        self.tree = tree
+        self.choices = choices
+        self._positions = {}
+        for position, user_id in enumerate(user_ids.tolist()):
+            self._positions.setdefault(user_id, position)
+
+    @classmethod
+    def build(cls, user_ids, vectors, choices=None, leaf_size=LEAF_SIZE):
+        # KDTree refuses an empty array.
+        return cls(user_ids, KDTree(vectors, leaf_size=leaf_size) if len(vectors) else None, choices)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def query(self, positions, k=DEFAULT_K):
+        """
+        Positions of the `k` nearest peers of the users at `positions` and
+        their cosine similarity to them, most similar first (arrays of shape
+        (len(positions), k)). A user is never its own peer.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        n = min(k + 1, len(self.user_ids))
+        distances, found = self.tree.query(np.asarray(self.tree.data)[positions], k=n)
+        # Drop the user itself, wherever it is among equally close users, else the farthest.
+        own = found == positions[:, np.newaxis]
+        drop = np.where(own.any(axis=1), own.argmax(axis=1), n - 1)
+        keep = np.ones(found.shape, dtype=bool)
+        keep[np.arange(len(found)), drop] = False
+        found = found[keep].reshape(len(found), n - 1)
+        distances = distances[keep].reshape(len(found), n - 1)
+        return found, 1 - distances ** 2 / 2
+
+    def peers(self, user_id, k=DEFAULT_K):
+        """The `k` users most similar to `user_id` (empty for an unknown user)."""
+        position = self._positions.get(user_id)
+        if position is None:
+            found, similarity = np.empty(0, dtype=np.int64), np.empty(0)
+        else:
+            found, similarity = self.query([position], k)
+            found, similarity = found[0], similarity[0]
+        peers = pd.DataFrame({"user_id": self.user_ids[found], "Peer_Similarity": similarity})
+        if self.choices is not None:
+            peers[CHOICE_COLUMN] = self.choices[found]
+        return peers
+
+
+def _read_index(out, signature):
+    try:
+        with open(out, "rb") as f:
+            state = pickle.load(f)
+        if state.get("signature") != signature:
+            return None
+        return PeerIndex(state["user_ids"], state["tree"], state["choices"])
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        return None
+
+
+def _write_index(index, out, signature):
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"signature": signature, "user_ids": index.user_ids, "tree": index.tree,
+                     "choices": index.choices}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, out)
+
+
+def load_peer_index(path=DEFAULT_PATH):
+    """The process-wide PeerIndex of `path`, from the persisted file when it is current."""
+    key = os.path.abspath(path)
+    signature = source_signature(path)
+    with _lock:
+        cached = _loaded.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        out = peers_path(path)
+        index = _read_index(out, signature)
+        if index is None:
+            index = PeerIndex.build(*read_vectors(path))
+            _write_index(index, out, signature)
+        _loaded[key] = (signature, index)
+        return index
+
+
+def main():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parser = argparse.ArgumentParser(description="Top-k most similar peers of every user.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--output", default="peers.parquet")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_peer_index(args.path)
+    print(f"index of {len(index):,} users ready in {time.perf_counter() - start:.1f} s")
+    if not len(index):
+        print("no users with chakra scores; nothing to write")
+        return
+    start = time.perf_counter()
+    tmp_path = args.output + ".tmp"
+    writer = None
+    for first in range(0, len(index), QUERY_ROWS):
+        positions = np.arange(first, min(first + QUERY_ROWS, len(index)))
+        found, similarity = index.query(positions, args.k)
+        columns = {
+            "user_id": np.repeat(index.user_ids[positions], found.shape[1]),
+            "Peer_Rank": np.tile(np.arange(1, found.shape[1] + 1), len(positions)),
+            "Peer_user_id": index.user_ids[found.ravel()],
+            "Peer_Similarity": similarity.ravel(),
+        }
+        if index.choices is not None:
+            columns[f"Peer_{CHOICE_COLUMN}"] = index.choices[found.ravel()]
+        table = pa.table(columns)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+        os.replace(tmp_path, args.output)
+    seconds = time.perf_counter() - start
+    print(f"top-{args.k} peers of {len(index):,} users -> {args.output} in {seconds:.1f} s "
+          f"({len(index) / max(seconds, 1e-9):,.0f} users/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Opt-in rerun profiler for the filter apps.
+
+With FILTER_PROFILE=1 (or FILTER_PROFILE=<path>) every rerun's spans are
+appended as one JSON line to filter_profile.jsonl (or <path>), and
+filter_ui.profile_sidebar() shows the last one. Unset, span() records
+nothing. Reruns are recorded per thread.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENV_VAR = "FILTER_PROFILE"
+DEFAULT_OUTPUT = "filter_profile.jsonl"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("name", "depth", "start", "seconds", "rows")
+
+    def __init__(self, name, depth, start):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.seconds = 0.0
+        # Rows left after the step, for filter stages.
+        self.rows = None
+
+
+class Rerun:
+    def __init__(self, app):
+        self.app = app
+        self.time = time.time()
+        self.spans = []
+        self.depth = 0
+        self.total = 0.0
+        self._started = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self._started
+
+    def as_dict(self):
+        return {
+            "app": self.app,
+            "time": self.time,
+            "total_ms": round(self.total * 1000, 3),
+            "spans": [
+                {"name": span.name, "depth": span.depth, "start_ms": round(span.start * 1000, 3),
+                 "ms": round(span.seconds * 1000, 3), "rows": span.rows}
+                for span in self.spans
+            ],
+        }
+
+
+def output_path():
+    """Where JSON lines go, or None when profiling is off."""
+    value = os.environ.get(ENV_VAR, "")
+    if not value or value == "0":
+        return None
+    return DEFAULT_OUTPUT if value == "1" else value
+
+
+def begin(app):
+    """Start recording this thread's rerun of `app`, if profiling is on."""
+    _local.rerun = Rerun(app) if output_path() else None
+    return _local.rerun
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as a step of the current rerun."""
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        # A throwaway span per call: sessions rerun on their own threads.
+        yield Span(name, 0, 0.0)
+        return
+    step = Span(name, rerun.depth, rerun.elapsed())
+    rerun.spans.append(step)
+    rerun.depth += 1
+    try:
+        yield step
+    finally:
+        rerun.depth -= 1
+        step.seconds = rerun.elapsed() - step.start
+
+
+def finish():
+    """Stop recording, append the rerun to the JSON lines file and return it (or None)."""
+    rerun = getattr(_local, "rerun", None)
+    _local.rerun = None
+    if rerun is None:
+        return None
+    rerun.total = rerun.elapsed()
+    line = json.dumps(rerun.as_dict())
+    with _write_lock:
+        with open(output_path(), "a") as f:
+            f.write(line + "\n")
+    return rerun
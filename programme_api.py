@@ -0,0 +1,165 @@
+"""
+Small asyncio HTTP service over programme_query.filter_programmes.
+
+Each request looks the index up with load_index(), so changes to the CSV
+are picked up.
+
+    python programme_api.py --data All_country_data.csv --port 8080
+
+    GET /programmes?learning_pathway=Engineering&country=India
+        &state=Kerala&state=Goa&degree_level=UG&page=2&page_size=50
+    GET /programmes?learning_pathway=Arts&country=Canada&cost_min=0&cost_max=20000
+        &columns=name&columns=cost_int&sort_by=cost_int&ascending=false
+    GET /health
+
+Stage parameters (state, institution_type, degree_level, degree) may be
+repeated. Responses are JSON; bad parameters give a 400.
+"""
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from programme_data import DEFAULT_PATH
+from programme_index import load_index
+from programme_query import filter_programmes
+from result_view import PAGE_SIZES
+
+STAGE_PARAMS = ["state", "institution_type", "degree_level", "degree"]
+MAX_PAGE_SIZE = 1000
+MAX_HEADER_BYTES = 16 * 1024
+
+
+def _single(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _integer(params, name, default=None):
+    value = _single(params, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def query_arguments(query):
+    """filter_programmes() keyword arguments for a URL query string."""
+    params = parse_qs(query, keep_blank_values=False)
+    learning_pathway = _single(params, "learning_pathway")
+    country = _single(params, "country")
+    if learning_pathway is None or country is None:
+        raise ValueError("learning_pathway and country are required")
+    cost_min = _integer(params, "cost_min")
+    cost_max = _integer(params, "cost_max")
+    if (cost_min is None) != (cost_max is None):
+        raise ValueError("cost_min and cost_max must be given together")
+    page_size = _integer(params, "page_size", PAGE_SIZES[0])
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return {
+        "learning_pathway": learning_pathway,
+        "country": country,
+        "selections": {name: params[name] for name in STAGE_PARAMS if name in params},
+        "cost_range": None if cost_min is None else (cost_min, cost_max),
+        "page": _integer(params, "page", 1),
+        "page_size": page_size,
+        "columns": params.get("columns"),
+        "sort_by": _single(params, "sort_by"),
+        "ascending": _single(params, "ascending", "true").lower() != "false",
+    }
+
+
+def respond(path, target):
+    """(status, JSON-serializable body) for one request target over the CSV at `path`."""
+    index = load_index(path)
+    url = urlsplit(target)
+    if url.path == "/health":
+        return HTTPStatus.OK, {"status": "ok", "rows": index.n_rows}
+    if url.path != "/programmes":
+        return HTTPStatus.NOT_FOUND, {"error": f"Unknown path: {url.path}"}
+    try:
+        result = filter_programmes(index, **query_arguments(url.query))
+    except ValueError as e:
+        return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+    # to_json handles NaN and numpy/Arrow scalars that json.dumps does not.
+    result["rows"] = json.loads(result["rows"].to_json(orient="records"))
+    return HTTPStatus.OK, result
+
+
+async def _read_head(reader):
+    # readuntil raises LimitOverrunError past the stream limit (MAX_HEADER_BYTES).
+    head = await reader.readuntil(b"\r\n\r\n")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    # Raises ValueError for a malformed Content-Length, which drops the connection.
+    headers["content-length"] = int(headers.get("content-length") or 0)
+    return request_line.split(), headers
+
+
+async def handle_connection(path, reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                request, headers = await _read_head(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                break
+            if len(request) != 3:
+                break
+            method, target, version = request
+            # Only GET is served; drain any body so the connection stays usable.
+            if headers["content-length"]:
+                await reader.readexactly(headers["content-length"])
+            if method != "GET":
+                status, body = HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Only GET is supported"}
+            else:
+                status, body = await loop.run_in_executor(None, respond, path, target)
+            payload = json.dumps(body).encode()
+            keep_alive = (headers.get("connection", "").lower() != "close"
+                          and version == "HTTP/1.1")
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path, host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(path, reader, writer), host, port,
+        limit=MAX_HEADER_BYTES,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API over the programme filters.")
+    parser.add_argument("--data", default=DEFAULT_PATH, help="programme CSV (default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    # Load (or map) the index before the first request rather than during it.
+    index = load_index(args.data)
+    print(f"Serving {index.n_rows} programmes on http://{args.host}:{args.port}")
+    asyncio.run(serve(args.data, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
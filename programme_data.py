@@ -0,0 +1,324 @@
+"""
+Shared loader for All_country_data.csv used by the filter apps.
+
+load_programmes() parses the CSV once per change and process, through a
+Parquet snapshot next to it when pyarrow is installed, and applies the
+dtypes of dtype_plan.py. load_shared_frame() memory-maps an uncompressed
+Arrow copy instead, so the data is held once in the page cache for every
+session and process. Rows appended to the CSV are parsed on their own, and
+appended_to() tells the index layer where they start.
+
+The returned frame is shared: callers must filter or copy it, never modify it
+in place.
+"""
+import hashlib
+import io
+import os
+import threading
+import weakref
+from collections import namedtuple
+
+import pandas as pd
+
+from dtype_plan import apply_dtype_plan, extend_frame, memory_report
+
+DEFAULT_PATH = "All_country_data.csv"
+SIGNATURE_KEY = b"source_signature"
+FINGERPRINT_BYTES = 64 * 1024
+# Signature of a load that stopped before a partially written last line; it
+# never matches the file, so the rest is picked up on the next call.
+PARTIAL = "partial"
+
+# A loaded version of the CSV. size is the number of bytes read and
+# fingerprint identifies them; parent (a weak reference) and start describe
+# the frame this one was extended from, if any. seen is the file signature
+# when a PARTIAL load left an unterminated last line unread.
+_Source = namedtuple("_Source", ["signature", "df", "size", "fingerprint", "parent", "start", "table", "seen"],
+                     defaults=[None])
+
+_lock = threading.Lock()
+_loaded = {}
+_shared = {}
+_reports = {}
+
+
+def source_signature(path):
+    """Size and mtime of the CSV, used to detect that it has changed."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _fingerprint(path, size):
+    """Hash of the header and of the bytes just before `size`; None unless they end a line."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = max(0, size - FINGERPRINT_BYTES)
+        f.seek(start)
+        block = f.read(size - start)
+    if len(block) != size - start or not block.endswith(b"\n"):
+        return None
+    return hashlib.sha1(header + block).hexdigest()
+
+
+def _source(path, signature, df, size=None, parent=None, table=None):
+    """Record of a load that read the first `size` bytes (default: all) of the CSV."""
+    file_size = int(signature.split(":")[0])
+    seen = None
+    if size is None:
+        size = file_size
+    elif size != file_size:
+        signature, seen = PARTIAL, signature
+    return _Source(signature, df, size, _fingerprint(path, size),
+                   None if parent is None else weakref.ref(parent),
+                   None if parent is None else len(parent), table, seen)
+
+
+def _read_appended(path, source, signature):
+    """
+    Rows appended to the CSV since `source` was loaded, as (frame, bytes read).
+
+    Returns None when the file was not only appended to (it shrank, or the
+    bytes read before have changed). The frame is None when no complete new
+    line has been written yet. A last line without a newline is read once
+    the file's `signature` is the one seen when that line was left unread.
+    """
+    if source.fingerprint is None or os.path.getsize(path) < source.size:
+        return None
+    if _fingerprint(path, source.size) != source.fingerprint:
+        return None
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(source.size)
+        tail = f.read()
+    # A writer may still be in the middle of the last line; leave it for later,
+    # unless the file has not changed since it was last left unread.
+    end = len(tail) if source.seen == signature else tail.rfind(b"\n") + 1
+    if end == 0:
+        return None, source.size
+    return pd.read_csv(io.BytesIO(header + tail[:end])), source.size + end
+
+
+def appended_to(df, previous):
+    """
+    Row where `df`'s new rows start if it was loaded by appending rows to
+    `previous`, otherwise None.
+    """
+    for sources in (_loaded, _shared):
+        for source in list(sources.values()):
+            if source.df is df and source.parent is not None and source.parent() is previous:
+                return source.start
+    return None
+
+
+def snapshot_path(path):
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def arrow_path(path):
+    return os.path.splitext(path)[0] + ".arrow"
+
+
+def _read_snapshot(path, signature):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    snapshot = snapshot_path(path)
+    if not os.path.exists(snapshot):
+        return None
+    try:
+        metadata = pq.read_schema(snapshot).metadata or {}
+        if metadata.get(SIGNATURE_KEY, b"").decode() != signature:
+            return None
+        return pq.read_table(snapshot).to_pandas()
+    except Exception:
+        # A corrupt or half-written snapshot just means we parse the CSV again.
+        return None
+
+
+def _csv_types(table):
+    """`table` with the column types read_csv would give: no dictionaries, 64-bit numbers."""
+    import pyarrow as pa
+
+    fields = []
+    for field in table.schema:
+        kind = field.type
+        if pa.types.is_dictionary(kind):
+            kind = kind.value_type
+        if pa.types.is_integer(kind):
+            kind = pa.int64()
+        elif pa.types.is_floating(kind):
+            kind = pa.float64()
+        fields.append(field.with_type(kind))
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def _write_snapshot(df, path, signature):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    snapshot = snapshot_path(path)
+    tmp_path = snapshot + ".tmp"
+    try:
+        table = _csv_types(pa.Table.from_pandas(df, preserve_index=False))
+        metadata = dict(table.schema.metadata or {})
+        metadata[SIGNATURE_KEY] = signature.encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, snapshot)
+    except Exception:
+        # The snapshot is only an accelerator; never fail the load because of it.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read_source(path, signature, use_snapshot=True):
+    df = _read_snapshot(path, signature) if use_snapshot else None
+    if df is None:
+        df = pd.read_csv(path)
+        if use_snapshot:
+            _write_snapshot(df, path, signature)
+    return df
+
+
+def load_programmes(path=DEFAULT_PATH, use_snapshot=True):
+    """
+    Return the programme dataset, parsing the CSV at most once per change.
+
+    The first call in a process reads the Parquet snapshot when it matches the
+    CSV, otherwise parses the CSV and refreshes the snapshot. Later calls
+    return the same frame until the CSV's size or mtime changes; rows
+    appended since then are parsed on their own and added to a new frame.
+    """
+    key = os.path.abspath(path)
+    signature = source_signature(path)
+    with _lock:
+        cached = _loaded.get(key)
+        if cached is not None and cached.signature == signature:
+            return cached.df
+
+        appended = _read_appended(path, cached, signature) if cached is not None else None
+        if appended is None:
+            raw = _read_source(path, signature, use_snapshot)
+            df = apply_dtype_plan(raw)
+            _reports[key] = memory_report(raw, df)
+            source = _source(path, signature, df)
+        elif appended[0] is None:
+            source = cached._replace(signature=PARTIAL, seen=signature)
+        else:
+            tail, size = appended
+            df = extend_frame(cached.df, tail)
+            source = _source(path, signature, df, size, parent=cached.df)
+            if use_snapshot:
+                _write_snapshot(df, path, source.signature)
+        _loaded[key] = source
+        return source.df
+
+
+def dtype_report(path=DEFAULT_PATH):
+    """
+    Memory report of the dtype plan for the last full heap load of `path`
+    (see dtype_plan.memory_report), or None if it was not loaded that way.
+    """
+    return _reports.get(os.path.abspath(path))
+
+
+def map_arrow(path, signature=None):
+    """Memory-map the Arrow file at `path`; None if it was not written for `signature` (when given)."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    metadata = table.schema.metadata or {}
+    if signature is not None and metadata.get(SIGNATURE_KEY, b"").decode() != signature:
+        return None
+    return table
+
+
+def write_arrow(table, path, signature=None):
+    """Atomically write `table` as an uncompressed Arrow file, recording `signature` if given."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    if signature is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[SIGNATURE_KEY] = signature.encode()
+        table = table.replace_schema_metadata(metadata)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Readers that mapped the previous file keep their (unlinked) copy.
+    os.replace(tmp_path, path)
+
+
+def _append_arrow(path, cached, signature):
+    """Map the Arrow file extended by the rows appended to the CSV, or None to rebuild it."""
+    import pyarrow as pa
+
+    appended = _read_appended(path, cached, signature)
+    if appended is None:
+        return None
+    tail, size = appended
+    if tail is None:
+        return cached._replace(signature=PARTIAL, seen=signature)
+    mapped = arrow_path(path)
+    # Another process may already have appended the same rows.
+    table = map_arrow(mapped, signature) if os.path.exists(mapped) else None
+    if table is None:
+        tail_table = pa.Table.from_pandas(tail, preserve_index=False).cast(cached.table.schema)
+        source = _source(path, signature, None, size)
+        write_arrow(pa.concat_tables([cached.table, tail_table]), mapped, source.signature)
+        table = map_arrow(mapped, source.signature)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    return _source(path, signature, df, size, parent=cached.df, table=table)
+
+
+def load_shared_frame(path=DEFAULT_PATH):
+    """
+    Memory-mapped, read-only view of the dataset, or None without pyarrow.
+
+    The Arrow file is (re)built from the Parquet snapshot or the CSV when it
+    is missing or was built from a different version of the CSV, and only
+    extended when rows were appended to the CSV. Columns of the returned
+    frame use pd.ArrowDtype, i.e. they point into the mapping rather than
+    holding their own copies.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    key = os.path.abspath(path)
+    signature = source_signature(path)
+    with _lock:
+        cached = _shared.get(key)
+        if cached is not None and cached.signature == signature:
+            return cached.df
+
+        source = None
+        if cached is not None:
+            try:
+                source = _append_arrow(path, cached, signature)
+            except Exception:
+                # Appended values that do not fit the existing column types; rebuild.
+                source = None
+        if source is None:
+            mapped = arrow_path(path)
+            table = None
+            if os.path.exists(mapped):
+                try:
+                    table = map_arrow(mapped, signature)
+                except Exception:
+                    table = None
+            if table is None:
+                try:
+                    df = _read_source(path, signature)
+                    write_arrow(_csv_types(pa.Table.from_pandas(df, preserve_index=False)), mapped, signature)
+                    table = map_arrow(mapped, signature)
+                except Exception:
+                    # Columns pyarrow cannot convert (e.g. mixed types) keep us on the heap path.
+                    return None
+            source = _source(path, signature, table.to_pandas(types_mapper=pd.ArrowDtype), table=table)
+        _shared[key] = source
+        return source.df
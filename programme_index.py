@@ -0,0 +1,616 @@
+"""
+Inverted index over the categorical filter columns of the programme dataset.
+
+Each column is factorized to integer codes with a sorted posting list of
+row ids per value. Filters intersect row ids on a ProgrammeSlice, and the
+frame is only materialized when the result is shown. With pyarrow,
+load_index() keeps the frame and the index arrays in memory-mapped files
+next to the CSV.
+"""
+import math
+import os
+import pickle
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cost_normalization import NORMALIZED_COST, normalized_costs
+from facets import FacetEngine
+from programme_data import DEFAULT_PATH, appended_to, load_programmes, load_shared_frame, source_signature
+from result_cache import ResultCache
+from text_search import TrigramIndex
+
+INDEXED_COLUMNS = ["Learning_Pathway", "country", "state", "institution_type", "degree_level", "degree"]
+# Indonesia prices programmes in `cost`, every other country in `cost_int`.
+COST_COLUMNS = ["cost", "cost_int"]
+# Bumped when the saved index layout changes, so older saved indexes are rebuilt.
+INDEX_VERSION = 3
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+class ColumnIndex:
+    """Integer codes and posting lists for a single column."""
+
+    def __init__(self, codes, values, row_ids, offsets):
+        self.codes = codes
+        self.values = values
+        self.lookup = {value: code for code, value in enumerate(values) if code > 0}
+        self.row_ids = row_ids
+        self.offsets = offsets
+        self._sort_ranks = None
+        self._search = None
+
+    @classmethod
+    def build(cls, series):
+        codes, uniques = pd.factorize(series, sort=False)
+        # Shift so that missing values (-1) become bucket 0 and real values start at 1.
+        codes = (codes + 1).astype(np.int32)
+        values = [None] + list(uniques)
+        row_ids = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[row_ids], np.arange(len(values) + 1))
+        return cls(codes, values, row_ids, offsets)
+
+    def arrays(self):
+        return {"codes": self.codes, "row_ids": self.row_ids, "offsets": self.offsets}
+
+    def extend(self, series):
+        """
+        A new ColumnIndex with the rows of `series` appended after the current ones.
+
+        New values get new codes, so existing codes (and facet counts keyed by
+        value) stay valid. Appended rows have the highest row ids, so each
+        posting list just grows at its end: the old lists are moved as blocks
+        and the new rows are placed behind them, without re-sorting anything.
+        """
+        start = len(self.codes)
+        local_codes, uniques = pd.factorize(series, sort=False)
+        values = list(self.values)
+        lookup = dict(self.lookup)
+        mapping = np.zeros(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(uniques):
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+            mapping[i + 1] = lookup[value]
+        tail_codes = mapping[local_codes + 1]
+
+        old_sizes = np.zeros(len(values), dtype=np.int64)
+        old_sizes[:len(self.values)] = np.diff(self.offsets)
+        new_sizes = np.bincount(tail_codes, minlength=len(values))
+        offsets = np.concatenate([[0], np.cumsum(old_sizes + new_sizes)])
+        old_offsets = np.concatenate([[0], np.cumsum(old_sizes)])
+
+        row_ids = np.empty(offsets[-1], dtype=np.int64)
+        shift = offsets[:-1] - old_offsets[:-1]
+        row_ids[np.arange(len(self.row_ids)) + np.repeat(shift, old_sizes)] = self.row_ids
+        order = np.argsort(tail_codes, kind="stable")
+        sorted_codes = tail_codes[order]
+        within = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes)
+        row_ids[offsets[sorted_codes] + old_sizes[sorted_codes] + within] = order + start
+        return ColumnIndex(np.concatenate([self.codes, tail_codes]), values, row_ids, offsets)
+
+    def codes_for(self, values):
+        return [self.lookup[v] for v in values if v in self.lookup]
+
+    def posting(self, code):
+        return self.row_ids[self.offsets[code]:self.offsets[code + 1]]
+
+    def posting_size(self, code):
+        return int(self.offsets[code + 1] - self.offsets[code])
+
+    def sort_ranks(self):
+        """Rank of every code in the sorted order of the values (computed once)."""
+        if self._sort_ranks is None:
+            values = self.values[1:]
+            try:
+                order = sorted(range(len(values)), key=values.__getitem__)
+            except TypeError:
+                order = sorted(range(len(values)), key=lambda i: str(values[i]))
+            ranks = np.zeros(len(self.values), dtype=np.int64)
+            ranks[np.asarray(order, dtype=np.int64) + 1] = np.arange(1, len(values) + 1)
+            self._sort_ranks = ranks
+        return self._sort_ranks
+
+    def search_index(self):
+        """Trigram index over the distinct values, for type-ahead search (built once)."""
+        if self._search is None:
+            self._search = TrigramIndex(self.values[1:])
+        return self._search
+
+
+class CostIndex:
+    """
+    A cost column coerced to numbers once at load, plus its global sort order.
+
+    The rank of every row in cost order is precomputed, so the cost-sorted
+    view of a slice is a sort of integer ranks, and bounds and ranges on it
+    are binary searches.
+    """
+
+    def __init__(self, values, order, sorted_values, rank, missing):
+        self.values = values
+        self.order = order
+        self.sorted_values = sorted_values
+        self.rank = rank
+        # Rows without a cost (NaN, "Not Available"), whatever `values` holds for them.
+        self.missing = missing
+
+    @staticmethod
+    def coerce(series):
+        """(costs with missing ones as 0, as the apps filter on them, missing mask)."""
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        missing = np.isnan(values)
+        values[missing] = 0
+        return values, missing
+
+    @classmethod
+    def build(cls, series):
+        return cls.from_values(*cls.coerce(series))
+
+    @classmethod
+    def from_values(cls, values, missing=None):
+        """Index of precomputed float costs; NaN (unpriced) sorts after every cost."""
+        if missing is None:
+            missing = np.isnan(values)
+        order = np.argsort(values, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return cls(values, order, values[order], rank, missing)
+
+    def arrays(self):
+        return {"values": self.values, "order": self.order, "sorted_values": self.sorted_values, "rank": self.rank,
+                "missing": self.missing}
+
+    def extend(self, series):
+        """A new CostIndex with `series` appended, merged into the sorted order."""
+        return self.extend_values(*self.coerce(series))
+
+    def extend_values(self, tail, missing=None):
+        if missing is None:
+            missing = np.isnan(tail)
+        start = len(self.values)
+        tail_order = np.argsort(tail, kind="stable")
+        # side="right" puts appended rows after equal costs, as a stable sort of all rows would.
+        pos = np.searchsorted(self.sorted_values, tail[tail_order], side="right")
+        order = np.insert(self.order, pos, tail_order + start)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return CostIndex(np.concatenate([self.values, tail]), order,
+                         np.insert(self.sorted_values, pos, tail[tail_order]), rank,
+                         np.concatenate([self.missing, missing]))
+
+    def below(self, high):
+        """Number of rows with a cost of at most `high`; they come first in `order`."""
+        return int(np.searchsorted(self.sorted_values, high, side="right"))
+
+    def sorted_for(self, rows):
+        """(costs ascending, matching row ids) for `rows` (None for all rows)."""
+        if rows is None:
+            return self.sorted_values, self.order
+        ranks = np.sort(self.rank[rows])
+        return self.sorted_values[ranks], self.order[ranks]
+
+
+class ProgrammeIndex:
+    def __init__(self, df, columns=INDEXED_COLUMNS, cost_columns=COST_COLUMNS):
+        costs = {column: CostIndex.build(df[column]) for column in cost_columns if column in df.columns}
+        if "country" in df.columns:
+            costs[NORMALIZED_COST] = CostIndex.from_values(normalized_costs(df))
+        self._attach(
+            df,
+            {column: ColumnIndex.build(df[column]) for column in columns if column in df.columns},
+            costs,
+        )
+
+    def _attach(self, df, columns, costs, stacked=None, shared=False, previous=None):
+        """Set up the index; with `previous` = (index, start), carry its caches over to these rows."""
+        self.df = df
+        # True when the frame and index arrays are memory-mapped files.
+        self.shared = shared
+        self.n_rows = len(df)
+        self.columns = columns
+        self.costs = costs
+        if previous is None:
+            self.facets = FacetEngine(self, stacked=stacked)
+            self.results = ResultCache()
+        else:
+            index, start = previous
+            self.facets = index.facets.extended(self, start)
+            self.results = index.results.extended(np.arange(start, self.n_rows), self.match)
+
+    def save(self, directory, signature):
+        """Write every index array as .npy plus a small metadata file."""
+        os.makedirs(directory)
+        meta = {"version": INDEX_VERSION, "signature": signature, "n_rows": self.n_rows,
+                "columns": [], "costs": []}
+        for i, (name, column) in enumerate(self.columns.items()):
+            meta["columns"].append((name, column.values))
+            for part, array in column.arrays().items():
+                np.save(os.path.join(directory, f"column{i}-{part}.npy"), array)
+        for i, (name, cost) in enumerate(self.costs.items()):
+            meta["costs"].append(name)
+            for part, array in cost.arrays().items():
+                np.save(os.path.join(directory, f"cost{i}-{part}.npy"), array)
+        np.save(os.path.join(directory, "stacked.npy"), self.facets.stacked)
+        with open(os.path.join(directory, "meta.pkl"), "wb") as f:
+            pickle.dump(meta, f)
+
+    @classmethod
+    def open(cls, df, directory, signature):
+        """
+        Memory-map an index written by save(), or return None if it is stale.
+
+        The arrays are opened read-only, so they are shared through the page
+        cache by every process that opens the same directory.
+        """
+        try:
+            with open(os.path.join(directory, "meta.pkl"), "rb") as f:
+                meta = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if (meta.get("version") != INDEX_VERSION or meta["signature"] != signature
+                or meta["n_rows"] != len(df)):
+            return None
+
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        columns = {}
+        for i, (name, values) in enumerate(meta["columns"]):
+            columns[name] = ColumnIndex(load(f"column{i}-codes.npy"), values,
+                                        load(f"column{i}-row_ids.npy"), load(f"column{i}-offsets.npy"))
+        costs = {}
+        for i, name in enumerate(meta["costs"]):
+            costs[name] = CostIndex(load(f"cost{i}-values.npy"), load(f"cost{i}-order.npy"),
+                                    load(f"cost{i}-sorted_values.npy"), load(f"cost{i}-rank.npy"),
+                                    load(f"cost{i}-missing.npy"))
+        index = cls.__new__(cls)
+        index._attach(df, columns, costs, stacked=load("stacked.npy"), shared=True)
+        return index
+
+    def extended(self, df, start):
+        """
+        A new index of `df`, this index's frame with rows appended from `start` on.
+
+        Column and cost indexes are extended rather than rebuilt, and cached
+        facet counts and filter results are carried over with the matching
+        new rows instead of being dropped. This index is not modified, so
+        sessions still reading it see a consistent frame and index.
+        """
+        tail = df.iloc[start:]
+        columns = {name: column.extend(df[name].iloc[start:]) for name, column in self.columns.items()}
+        costs = {name: cost.extend_values(normalized_costs(tail)) if name == NORMALIZED_COST
+                 else cost.extend(tail[name]) for name, cost in self.costs.items()}
+        index = type(self).__new__(type(self))
+        index._attach(df, columns, costs, previous=(self, start))
+        return index
+
+    def adopt(self, other):
+        """
+        Use the (memory-mapped) arrays of `other`, an index of the same frame,
+        keeping the caches; only for an index no session has seen yet.
+        """
+        self.columns = other.columns
+        self.costs = other.costs
+        self.facets.stacked = other.facets.stacked
+        self.shared = other.shared
+
+    def match(self, filters, rows):
+        """
+        The subset of the sorted row ids `rows` that passes the filter prefix
+        `filters`, or None for a prefix that cannot be re-evaluated (a mask).
+        """
+        if filters is None:
+            return None
+        for column, values in filters:
+            if not isinstance(column, tuple):
+                rows = self.select(column, values, within=rows)
+            elif column[0] == "cost":
+                _, name, low, high = column
+                costs = self.costs[name].values[rows]
+                rows = rows[(costs >= low) & (costs <= high)]
+            else:
+                return None
+        return rows
+
+    def memory_usage(self):
+        """Bytes of index arrays that are memory-mapped (shared) and on the heap (private)."""
+        usage = {"mapped": 0, "heap": 0}
+        arrays = [self.facets.stacked]
+        for column in self.columns.values():
+            arrays.extend(column.arrays().values())
+        for cost in self.costs.values():
+            arrays.extend(cost.arrays().values())
+        for array in arrays:
+            usage["mapped" if isinstance(array, np.memmap) else "heap"] += array.nbytes
+        return usage
+
+    def select(self, column, values, within=None):
+        """
+        Sorted row ids whose `column` is one of `values`, restricted to `within`.
+
+        `within` is a sorted row-id array or None for all rows. Small posting
+        lists are intersected with `within` by binary search; otherwise the
+        codes of the `within` rows are tested against a per-code bitmap, which
+        costs one pass over `within` instead of over the whole column.
+        """
+        index = self.columns[column]
+        codes = index.codes_for(values)
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+
+        total = sum(index.posting_size(code) for code in codes)
+        if within is None or total < len(within):
+            rows = np.concatenate([index.posting(code) for code in codes])
+            if len(codes) > 1:
+                rows.sort()
+            if within is None:
+                return rows
+            pos = np.searchsorted(within, rows)
+            pos[pos == len(within)] = 0
+            return rows[within[pos] == rows]
+
+        wanted = np.zeros(len(index.values), dtype=bool)
+        wanted[codes] = True
+        return within[wanted[index.codes[within]]]
+
+    def within_budget(self, budget, predicates=(), cost=NORMALIZED_COST):
+        """
+        Row ids passing the (column, values) `predicates` whose `cost` is at
+        most `budget`, cheapest first.
+
+        The rows within budget are a prefix of the cost's global sort order,
+        found by one binary search. When the predicates match fewer rows than
+        that prefix, their postings are intersected first and put in cost
+        order through the precomputed ranks; otherwise the prefix is scanned
+        once against per-code bitmaps, keeping its order.
+        """
+        index = self.costs[cost]
+        stop = index.below(budget)
+        predicates = [(column, list(values)) for column, values in predicates]
+        matched = min((sum(self.columns[column].posting_size(code)
+                           for code in self.columns[column].codes_for(values))
+                       for column, values in predicates), default=None)
+        if matched is not None and matched < stop:
+            ranks = np.sort(index.rank[self.execute(predicates)])
+            return index.order[ranks[:np.searchsorted(ranks, stop)]]
+        rows = index.order[:stop]
+        for column, values in predicates:
+            column_index = self.columns[column]
+            wanted = np.zeros(len(column_index.values), dtype=bool)
+            wanted[column_index.codes_for(values)] = True
+            rows = rows[wanted[column_index.codes[rows]]]
+        return rows
+
+    def execute(self, predicates):
+        """
+        Evaluate a conjunction of (column, values) predicates in one go.
+
+        Predicates are applied from the most to the least selective (by total
+        posting-list length), so the first one starts from the smallest row
+        set and no intermediate slice of the chain is ever materialized.
+        """
+        if not predicates:
+            return None
+
+        def estimate(predicate):
+            column, values = predicate
+            index = self.columns[column]
+            return sum(index.posting_size(code) for code in index.codes_for(values))
+
+        rows = None
+        for column, values in sorted(predicates, key=estimate):
+            rows = self.select(column, values, within=rows)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def all(self):
+        return ProgrammeSlice(self)
+
+
+class ProgrammeSlice:
+    """
+    An immutable, lazily evaluated selection of rows of the indexed frame.
+
+    eq() and isin() only record the predicate. A chain of them from the
+    unfiltered slice is compiled into a single query (ProgrammeIndex.execute)
+    the first time its rows are needed (or taken from the index's result
+    cache), and dropdown counts for a prefix that is already in the facet
+    cache never need the rows at all. Nothing is
+    copied out of the shared frame until frame() or column() is called.
+    """
+
+    def __init__(self, index, rows=None, filters=frozenset(), predicates=(), compute=None):
+        self.index = index
+        # None stands for "every row" so the unfiltered slice costs nothing.
+        self._rows = rows
+        # Deferred row computation, run at most once.
+        self._compute = compute
+        # Normalized filter prefix: one (column, frozenset(values)) pair per
+        # filtered column, so the same selection reached in a different order
+        # has the same key. None when the slice came from an unkeyed mask.
+        self.filters = filters
+        # Categorical predicates when the slice is a pure eq/isin chain from
+        # the unfiltered slice, None once a cost range or mask is involved.
+        self.predicates = predicates
+        self._facets = None
+
+    @property
+    def rows(self):
+        if self._compute is not None:
+            # Any slice with the same filter prefix, from any session, shares the result.
+            self._rows = self.index.results.rows(self.filters, self._compute)
+            self._compute = None
+        return self._rows
+
+    def __len__(self):
+        if self._compute is None:
+            return self.index.n_rows if self._rows is None else len(self._rows)
+        facets = self._facets or self.index.facets.peek(self.filters)
+        if facets is not None:
+            return facets.total
+        return len(self.rows)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def row_ids(self):
+        rows = self.rows
+        if rows is None:
+            return np.arange(self.index.n_rows)
+        return rows
+
+    def eq(self, column, value):
+        return self.isin(column, [value])
+
+    def _with_filter(self, column, values):
+        if self.filters is None:
+            return None
+        merged = dict(self.filters)
+        values = frozenset(values)
+        merged[column] = merged[column] & values if column in merged else values
+        return frozenset(merged.items())
+
+    def isin(self, column, values):
+        values = list(values)
+        filters = self._with_filter(column, values)
+        if self.predicates is not None:
+            predicates = self.predicates + ((column, values),)
+            return ProgrammeSlice(self.index, filters=filters, predicates=predicates,
+                                  compute=lambda: self.index.execute(predicates))
+        return ProgrammeSlice(self.index, filters=filters, predicates=None,
+                              compute=lambda: self.index.select(column, values, within=self.rows))
+
+    def mask(self, keep, key=None):
+        """
+        Keep the rows where the boolean array `keep` (aligned to this slice) is true.
+
+        `key` names the condition (e.g. a cost range) so the result can still
+        be cached; without it the slice and everything derived from it are
+        computed uncached.
+        """
+        rows = self.row_ids()[np.asarray(keep, dtype=bool)]
+        filters = None if key is None else self._with_filter(("mask",) + tuple(key), [True])
+        return ProgrammeSlice(self.index, rows, filters, predicates=None)
+
+    def facets(self):
+        if self._facets is None:
+            self._facets = self.index.facets.facets(self.filters, lambda: self.rows)
+        return self._facets
+
+    def value_counts(self, column):
+        return self.facets().value_counts(column)
+
+    def unique(self, column):
+        return list(self.facets().options(column))
+
+    def search(self, column, query, limit=50):
+        """Up to `limit` (value, count) pairs of `column` in this slice matching `query`, best first."""
+        return self.index.columns[column].search_index().search(query, self.value_counts(column), limit)
+
+    def cost_order(self, column):
+        """Costs of this slice in ascending order and the row ids they belong to."""
+        return self.facets().derived(("cost_order", column), lambda: self.index.costs[column].sorted_for(self.rows))
+
+    def cost_range(self, column):
+        """Integer (min, max) bounds of the coerced cost column, rounded outwards; (0, 0) for an empty slice."""
+        costs, _ = self.cost_order(column)
+        # Unpriced rows (NaN, only in the normalized cost) sort last and have no cost to offer.
+        costs = costs[:np.searchsorted(costs, np.inf, side="right")]
+        if len(costs) == 0:
+            return 0, 0
+        # Normalized costs are fractional; truncating the max would leave the dearest rows out.
+        return math.floor(costs[0]), math.ceil(costs[-1])
+
+    def cost_between(self, column, low, high):
+        """Rows whose coerced cost lies in [low, high], found by binary search."""
+        costs, rows = self.cost_order(column)
+        start = np.searchsorted(costs, low, side="left")
+        stop = np.searchsorted(costs, high, side="right")
+        if start == 0 and stop == len(costs):
+            # The slider is at its full range: keep this slice and its cache key.
+            return self
+        filters = self._with_filter(("cost", column, low, high), [True])
+        return ProgrammeSlice(self.index, filters=filters, predicates=None,
+                              compute=lambda: np.sort(rows[start:stop]))
+
+    def column(self, column):
+        series = self.index.df[column]
+        return series if self.rows is None else series.iloc[self.rows]
+
+    def frame(self):
+        df = self.index.df
+        return df if self.rows is None else df.iloc[self.rows]
+
+
+def index_dir(path):
+    return os.path.splitext(path)[0] + ".index"
+
+
+def _open_shared_index(df, path, built=None):
+    """
+    Memory-map the saved index for `path`, rebuilding it when the CSV has
+    changed. `built` is an up-to-date index of `df` to save instead of
+    building one.
+    """
+    directory = index_dir(path)
+    signature = source_signature(path)
+    index = ProgrammeIndex.open(df, directory, signature)
+    if index is not None:
+        return index
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if built is None:
+        built = ProgrammeIndex(df)
+    built.save(tmp_dir, signature)
+    # Processes that already mapped the old arrays keep reading the unlinked files.
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # Another process published its copy first; use that one.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    # If a concurrent rebuild removed the directory again, use the heap copy this time.
+    return ProgrammeIndex.open(df, directory, signature) or built
+
+
+def load_index(path=DEFAULT_PATH, shared=True):
+    """
+    Index over the programme dataset, rebuilt only when the CSV changes.
+
+    With shared=True (and pyarrow installed) the frame comes from the
+    memory-mapped Arrow file and the index arrays from memory-mapped .npy
+    files; otherwise both live on this process's heap.
+
+    When rows were only appended to the CSV, the existing index is extended
+    (ProgrammeIndex.extended), so its facet and result caches survive the
+    refresh, and the new index replaces it in one assignment.
+    """
+    df = load_shared_frame(path) if shared else None
+    if df is None:
+        shared = False
+        df = load_programmes(path)
+    key = (os.path.abspath(path), shared)
+    with _lock:
+        index = _indexes.get(key)
+        start = None if index is None else appended_to(df, index.df)
+        if start is not None:
+            index = index.extended(df, start)
+            if shared:
+                # Publish the extended arrays for other processes and map them here as well.
+                index.adopt(_open_shared_index(df, path, built=index))
+            _indexes[key] = index
+        elif index is None or index.df is not df:
+            index = None
+            if shared:
+                index = _open_shared_index(df, path)
+            if index is None:
+                index = ProgrammeIndex(df)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,296 @@
+"""
+Programme data partitioned by Learning_Pathway and country.
+
+The shared frame is written as one Arrow file per (Learning_Pathway,
+country) pair, plus a manifest.json of row counts, in
+All_country_data.partitions/ next to the CSV. The manifest answers the
+first two dropdowns; choosing a country maps just its files into their own
+ProgrammeIndex. Appended rows rewrite only the files of their pairs.
+Without pyarrow, load_partitioned() falls back to load_index().
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import profiler
+from programme_data import DEFAULT_PATH, appended_to, load_shared_frame, map_arrow, source_signature, write_arrow
+from programme_index import ProgrammeIndex, load_index
+
+PARTITION_COLUMNS = ["Learning_Pathway", "country"]
+MANIFEST = "manifest.json"
+# Column of every partition file holding each row's position in the CSV.
+ROW_COLUMN = "__row__"
+# Loaded selections kept in memory (a merged Australia & New Zealand counts as one).
+MAX_LOADED = 16
+
+_lock = threading.Lock()
+_stores = {}
+
+
+def partition_dir(path):
+    return os.path.splitext(path)[0] + ".partitions"
+
+
+def partition_file(learning_pathway, country):
+    """File name of a pair; the same pair keeps its name across rebuilds."""
+    key = json.dumps([learning_pathway, country]).encode()
+    return hashlib.sha1(key).hexdigest()[:16] + ".arrow"
+
+
+def _pair_rows(df):
+    """Positions in `df` of the rows of every (Learning_Pathway, country) pair."""
+    return df.groupby(PARTITION_COLUMNS, sort=True, observed=True).indices
+
+
+def _pair_table(df, rows, offset=0):
+    """Arrow table of the rows of `df` at `rows`, numbered in the CSV from `offset`."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.iloc[rows], preserve_index=False)
+    return table.append_column(ROW_COLUMN, pa.array(rows + offset, type=pa.int64()))
+
+
+def _write_manifest(manifest, directory):
+    path = os.path.join(directory, MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _partition_entry(learning_pathway, country, rows):
+    return {"Learning_Pathway": learning_pathway, "country": country, "rows": rows,
+            "file": partition_file(learning_pathway, country)}
+
+
+def write_partitions(df, directory, signature):
+    """Write the partitioned layout of the (memory-mapped) frame `df` into `directory`."""
+    os.makedirs(directory)
+    partitions = []
+    for (learning_pathway, country), rows in _pair_rows(df).items():
+        entry = _partition_entry(learning_pathway, country, len(rows))
+        write_arrow(_pair_table(df, rows), os.path.join(directory, entry["file"]))
+        partitions.append(entry)
+    manifest = {"signature": signature, "columns": list(df.columns), "partitions": partitions}
+    _write_manifest(manifest, directory)
+    return manifest
+
+
+def _read_manifest(directory, signature):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("signature") == signature else None
+
+
+def _open_manifest(df, directory, signature):
+    """The manifest of an up-to-date layout of `df`, writing the layout if needed."""
+    manifest = _read_manifest(directory, signature)
+    if manifest is not None:
+        return manifest
+    tmp_dir = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    manifest = write_partitions(df, tmp_dir, signature)
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, directory)
+    except OSError:
+        # Another process published its layout first; it was built from the same CSV.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+class PartitionedProgrammes:
+    """Manifest of a partitioned layout plus an LRU of loaded partitions."""
+
+    def __init__(self, directory, manifest, df, max_loaded=MAX_LOADED):
+        self.directory = directory
+        self.signature = manifest["signature"]
+        self.columns = manifest["columns"]
+        self.partitions = {(p["Learning_Pathway"], p["country"]): p for p in manifest["partitions"]}
+        self.n_rows = sum(p["rows"] for p in manifest["partitions"])
+        # The shared frame the layout was written from, to recognise appends to it.
+        self.df = df
+        self.max_loaded = max_loaded
+        self.hits = 0
+        self.misses = 0
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._loaded)
+
+    def all(self):
+        return ManifestSlice(self)
+
+    def counts(self, learning_pathway=None):
+        """Rows per Learning_Pathway, or per country of `learning_pathway`."""
+        counts = {}
+        for (lp, country), partition in self.partitions.items():
+            if learning_pathway is None:
+                counts[lp] = counts.get(lp, 0) + partition["rows"]
+            elif lp == learning_pathway:
+                counts[country] = partition["rows"]
+        return counts
+
+    def loaded(self):
+        """(key, index) of the loaded selections, most recently used last."""
+        with self._lock:
+            return list(self._loaded.items())
+
+    def index(self, learning_pathway, countries):
+        """
+        ProgrammeIndex over the rows of `learning_pathway` in `countries`, or
+        None when there are none.
+        """
+        key = (learning_pathway, tuple(sorted(c for c in set(countries) if (learning_pathway, c) in self.partitions)))
+        if not key[1]:
+            return None
+        # Loading under the lock means concurrent sessions asking for the same
+        # partition read it once.
+        with self._lock:
+            index = self._loaded.get(key)
+            if index is not None:
+                self._loaded.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+            with profiler.span("load partition") as span:
+                index = ProgrammeIndex(self._read(key))
+                span.rows = index.n_rows
+            self._loaded[key] = index
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+            return index
+
+    def _read(self, key):
+        import pyarrow as pa
+
+        learning_pathway, countries = key
+        tables = [map_arrow(os.path.join(self.directory, self.partitions[learning_pathway, c]["file"]))
+                  for c in countries]
+        # A single pair stays a view of its mapped file; merged pairs are put back in CSV order.
+        table = tables[0] if len(tables) == 1 else pa.concat_tables(tables).sort_by(ROW_COLUMN)
+        return table.drop_columns([ROW_COLUMN]).to_pandas(types_mapper=pd.ArrowDtype)
+
+    def extended(self, df, start, signature):
+        """
+        A new store for `df`, the frame the layout was written from with rows
+        appended from `start` on: only the files of their pairs are
+        rewritten, and loaded selections of those pairs are extended. This
+        store is not modified, so sessions still reading it are unaffected.
+        """
+        import pyarrow as pa
+
+        tail = df.iloc[start:]
+        partitions = dict(self.partitions)
+        changed = set()
+        for (learning_pathway, country), rows in _pair_rows(tail).items():
+            entry = _partition_entry(learning_pathway, country, 0)
+            path = os.path.join(self.directory, entry["file"])
+            table = _pair_table(tail, rows, start)
+            if (learning_pathway, country) in partitions:
+                existing = map_arrow(path)
+                # Another process may already have appended these rows.
+                if existing.num_rows and existing[ROW_COLUMN][-1].as_py() >= start:
+                    table = existing
+                else:
+                    table = pa.concat_tables([existing, table.cast(existing.schema)])
+                    write_arrow(table, path)
+            else:
+                write_arrow(table, path)
+            entry["rows"] = table.num_rows
+            partitions[learning_pathway, country] = entry
+            changed.add((learning_pathway, country))
+        manifest = {"signature": signature, "columns": self.columns, "partitions": list(partitions.values())}
+        _write_manifest(manifest, self.directory)
+
+        store = PartitionedProgrammes(self.directory, manifest, df, self.max_loaded)
+        store.hits, store.misses = self.hits, self.misses
+        for key, index in self.loaded():
+            learning_pathway, countries = key
+            if any((learning_pathway, c) in changed for c in countries):
+                # New rows come after every loaded one, also in merged pairs.
+                index = index.extended(store._read(key), index.n_rows)
+            store._loaded[key] = index
+        return store
+
+
+class ManifestSlice:
+    """
+    The unfiltered data or one Learning_Pathway of it, answered from the
+    manifest. Supports what the first two dropdowns need.
+    """
+
+    def __init__(self, store, learning_pathway=None):
+        self.store = store
+        self.learning_pathway = learning_pathway
+
+    def _column(self):
+        return "Learning_Pathway" if self.learning_pathway is None else "country"
+
+    def value_counts(self, column):
+        if column != self._column():
+            raise KeyError(f"{column} counts need a loaded partition")
+        return self.store.counts(self.learning_pathway)
+
+    def unique(self, column):
+        return sorted(self.value_counts(column))
+
+    def __len__(self):
+        return sum(self.store.counts(self.learning_pathway).values())
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def eq(self, column, value):
+        return self.isin(column, [value])
+
+    def isin(self, column, values):
+        if column != self._column():
+            raise KeyError(f"Filter on {column} before choosing a Learning_Pathway and country")
+        if self.learning_pathway is None:
+            if len(values) != 1:
+                raise ValueError("Select a single Learning_Pathway")
+            return ManifestSlice(self.store, values[0])
+        index = self.store.index(self.learning_pathway, values)
+        if index is None:
+            # No rows: an empty slice over an empty frame of the same columns.
+            index = ProgrammeIndex(pd.DataFrame(columns=self.store.columns))
+        # Every row of the partition matches; the filters name the slice (e.g. for exports).
+        return index.all().eq("Learning_Pathway", self.learning_pathway).isin(column, values)
+
+
+def load_partitioned(path=DEFAULT_PATH):
+    """
+    The partitioned store for `path`, writing or patching the layout when
+    the CSV has changed, or the whole-dataset ProgrammeIndex when there is
+    no memory-mapped frame to partition. Both have an all() slice for the
+    Learning Pathway and Country stages.
+    """
+    df = load_shared_frame(path)
+    if df is None:
+        # No pyarrow, or columns Arrow cannot hold: the heap index and its dtype plan.
+        return load_index(path)
+    key = os.path.abspath(path)
+    signature = source_signature(path)
+    with _lock:
+        store = _stores.get(key)
+        if store is not None and store.df is df:
+            return store
+        start = None if store is None else appended_to(df, store.df)
+        if start is not None:
+            store = store.extended(df, start, signature)
+        else:
+            directory = partition_dir(path)
+            store = PartitionedProgrammes(directory, _open_manifest(df, directory, signature), df)
+        _stores[key] = store
+        return store
@@ -0,0 +1,112 @@
+"""
+Headless filter queries, for batch jobs and the HTTP API.
+
+filter_programmes() runs the filter_all.py steps without widgets. A stage
+missing from `selections` keeps every value, and a cost stage without
+`cost_range` keeps the full range. compare_programmes() counts programmes
+under a budget in several countries at once, on the cost in US dollars.
+"""
+import numpy as np
+
+from cost_normalization import NORMALIZED_COST
+from filter_plan import ALL, FILTER_ALL_PLANS, country_values
+from result_view import PAGE_SIZES, page_count, page_frame
+
+
+def filter_programmes(index, learning_pathway, country, selections=None, cost_range=None,
+                      page=1, page_size=PAGE_SIZES[0], columns=None, sort_by=None, ascending=True,
+                      plans=FILTER_ALL_PLANS):
+    """
+    Filter the programmes and return counts plus one page of rows.
+
+    selections maps a stage column (state, institution_type, degree_level,
+    degree) to a value or a list of values; ALL or a missing entry keeps
+    every value. cost_range is an inclusive (low, high) pair for the
+    country's cost stage. Raises ValueError for an unknown column or a page
+    outside the result.
+
+    Returns a dict with "counts" (rows left after each step, keyed by
+    column), "cost_bounds" ((min, max) offered by the cost stage, or None),
+    "total", "page", "pages" and "rows" (a DataFrame).
+    """
+    selections = selections or {}
+    known = list(index.df.columns)
+    for column in list(columns or []) + ([sort_by] if sort_by else []):
+        if column not in known:
+            raise ValueError(f"Unknown column: {column}")
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+
+    df_slice = index.all().eq("Learning_Pathway", learning_pathway)
+    counts = {"Learning_Pathway": len(df_slice)}
+    df_slice = df_slice.isin("country", country_values(country))
+    counts["country"] = len(df_slice)
+
+    cost_bounds = None
+    for stage in plans.get(country, []):
+        if stage.kind == "cost":
+            cost_bounds = df_slice.cost_range(stage.column)
+            low, high = cost_range if cost_range is not None else cost_bounds
+            df_slice = df_slice.cost_between(stage.column, low, high)
+        else:
+            selected = selections.get(stage.column, ALL)
+            if not isinstance(selected, (list, tuple, set)):
+                selected = [selected]
+            if ALL not in selected:
+                df_slice = df_slice.isin(stage.column, selected)
+        counts[stage.column] = len(df_slice)
+
+    total = len(df_slice)
+    pages = page_count(total, page_size)
+    if not 1 <= page <= pages:
+        raise ValueError(f"page must be between 1 and {pages}")
+    return {
+        "counts": counts,
+        "cost_bounds": cost_bounds,
+        "total": total,
+        "page": page,
+        "pages": pages,
+        "rows": page_frame(df_slice, page, page_size, columns, sort_by, ascending),
+    }
+
+
+def compare_programmes(index, countries, budget, degrees=None, learning_pathway=None,
+                       page=1, page_size=PAGE_SIZES[0], columns=None):
+    """
+    Programmes in any of `countries` (Country dropdown options, so
+    "Australia & New Zealand" works) costing at most `budget` US dollars,
+    cheapest first, optionally restricted to `degrees` and a Learning_Pathway.
+
+    Returns a dict with "counts" (matching rows per country option), "total",
+    "page", "pages" and "rows": a DataFrame of the page's rows with their
+    normalized cost in a NORMALIZED_COST column. Programmes without a usable
+    cost are never within budget.
+    """
+    known = list(index.df.columns)
+    for column in columns or []:
+        if column not in known:
+            raise ValueError(f"Unknown column: {column}")
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    predicates = [("country", [value for country in countries for value in country_values(country)])]
+    if degrees:
+        predicates.append(("degree", list(degrees)))
+    if learning_pathway is not None:
+        predicates.append(("Learning_Pathway", [learning_pathway]))
+    rows = index.within_budget(budget, predicates)
+
+    country_index = index.columns["country"]
+    per_value = np.bincount(country_index.codes[rows], minlength=len(country_index.values))
+    counts = {country: int(sum(per_value[code] for code in country_index.codes_for(country_values(country))))
+              for country in countries}
+
+    total = len(rows)
+    pages = page_count(total, page_size)
+    if not 1 <= page <= pages:
+        raise ValueError(f"page must be between 1 and {pages}")
+    page_rows = rows[(page - 1) * page_size:page * page_size]
+    frame = index.df.iloc[page_rows]
+    if columns is not None:
+        frame = frame[list(columns)]
+    frame = frame.assign(**{NORMALIZED_COST: index.costs[NORMALIZED_COST].values[page_rows].round(2)})
+    return {"counts": counts, "total": total, "page": page, "pages": pages, "rows": frame}
@@ -1,29 +1,25 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from degree_encoder import lazy_encoder
+from embedding_cache import open_cache
+from degree_ranking import MODEL_NAME, REFERENCE_DEGREES, load_rankings, rank_matches
 
 # Load the dataset
 file_path = "india_usa_whole_data.csv"
 degree_df = pd.read_csv(file_path)
 
 # Define the reference sorted list of engineering degrees
-reference_degrees = [
-    "Computer Science Engineering (CSE)",
-    "Electronics and Communication Engineering (ECE)",
-    "Information Technology (IT)",
-    "Mechanical Engineering",
-    "Civil Engineering",
-    "Electrical Engineering",
-    "Chemical Engineering",
-    "Biotechnology/Biomedical Engineering",
-    "Aerospace/Aeronautical Engineering",
-    "Other Specialized Fields (e.g., Industrial, Agricultural, Metallurgical Engineering)"
-]
+reference_degrees = REFERENCE_DEGREES
 
 # Load the BERT model from SentenceTransformers
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# (loaded on first use, on the backend named by DEGREE_MODEL_BACKEND; see degree_encoder.py)
+model = lazy_encoder(MODEL_NAME)
+model_name = model.name
+# Embeddings are cached on disk by (model, text), so only degrees never seen before are encoded
+embeddings = open_cache(model_name, model.encode)
+# Rankings precomputed by `python degree_ranking.py`, or None when they are missing or stale
+rankings = load_rankings(file_path, model_name, reference_degrees)
 
 def rank_degrees():
     """
@@ -59,47 +55,20 @@ def rank_degrees():
         st.write("### Unique Degrees Offered")
         st.write(unique_degrees)
 
-        # Compute BERT embeddings for the reference degrees and the offered degrees
-        ref_embeddings = model.encode(reference_degrees)
-        offered_embeddings = model.encode(unique_degrees)
+        # Look the college up in the precomputed rankings, ranking it here only without them
+        ranked_df = None
+        if rankings is not None:
+            ranked_df = rankings.college(selected_country, selected_learning_pathway, selected_college)
+        if ranked_df is None:
+            # Compute BERT embeddings for the reference degrees and the offered degrees
+            ref_embeddings = embeddings.encode(reference_degrees)
+            offered_embeddings = embeddings.encode(unique_degrees)
 
-        # Compute cosine similarity between each offered degree and each reference degree
-        similarity_matrix = cosine_similarity(offered_embeddings, ref_embeddings)
+            # Compute cosine similarity between each offered degree and each reference degree
+            similarity_matrix = cosine_similarity(offered_embeddings, ref_embeddings)
 
-        ranking_info = []
-        for i, degree in enumerate(unique_degrees):
-            # Determine the best matching reference degree for the offered degree
-            best_match_idx = np.argmax(similarity_matrix[i])
-            best_similarity = similarity_matrix[i][best_match_idx]
-
-            # Skip degrees with zero similarity
-            if best_similarity == 0:
-                continue
-
-            # Determine degree type ranking based on keywords (case-insensitive)
-            lower_degree = degree.lower()
-            if "b.tech" in lower_degree:
-                type_rank = 1
-            elif "b.e" in lower_degree:
-                type_rank = 2
-            elif "diploma" in lower_degree:
-                type_rank = 3
-            else:
-                type_rank = 4  # Other degrees ranked lower than B.Tech, B.E, or Diploma
-
-            ranking_info.append((degree, best_match_idx, best_similarity, type_rank))
-
-        # Sort by:
-        # 1. The order of the matched reference degree (lower index is higher priority)
-        # 2. The degree type ranking (B.Tech (1) > B.E (2) > Diploma (3) > others (4))
-        # 3. Similarity score (higher is better)
-        ranked_degrees = sorted(ranking_info, key=lambda x: (x[1], x[3], -x[2]))
-
-        # Build a DataFrame to display the ranking
-        ranked_df = pd.DataFrame(ranked_degrees, columns=["Degree", "Reference_Index", "Similarity_Score", "Type_Rank"])
-        ranked_df["Matched_Reference"] = ranked_df["Reference_Index"].apply(lambda idx: reference_degrees[idx])
-        ranked_df["Rank"] = range(1, len(ranked_df) + 1)
-        ranked_df = ranked_df[["Rank", "Degree", "Matched_Reference", "Type_Rank", "Similarity_Score"]]
+            # Best match, degree type and order of all degrees at once (see degree_ranking.py)
+            ranked_df = rank_matches(unique_degrees, similarity_matrix, reference_degrees)
 
         st.write("### Ranked Degrees")
         st.dataframe(ranked_df)
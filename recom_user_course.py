@@ -1,50 +1,42 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import random
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from degree_encoder import lazy_encoder
+from embedding_cache import open_cache
+from course_recommendation import by_rank
+from degree_ranking import MODEL_NAME, REFERENCE_DEGREES, load_rankings, rank_matches
+from user_scores import load_user_index
+from peer_index import load_peer_index
 
 # Load the datasets
 file_path_degrees = "india_usa_whole_data.csv"
 file_path_skills = "skill_score_data.csv"
 degree_df = pd.read_csv(file_path_degrees)
-skill_score_df = pd.read_csv(file_path_skills)
 
 # Define the reference sorted list of engineering degrees
-reference_degrees = [
-    "Computer Science Engineering (CSE)",
-    "Electronics and Communication Engineering (ECE)",
-    "Information Technology (IT)",
-    "Mechanical Engineering",
-    "Civil Engineering",
-    "Electrical Engineering",
-    "Chemical Engineering",
-    "Biotechnology/Biomedical Engineering",
-    "Aerospace/Aeronautical Engineering",
-    "Other Specialized Fields (e.g., Industrial, Agricultural, Metallurgical Engineering)"
-]
+reference_degrees = REFERENCE_DEGREES
 
 # Load the BERT model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# (loaded on first use, on the backend named by DEGREE_MODEL_BACKEND; see degree_encoder.py)
+model = lazy_encoder(MODEL_NAME)
+model_name = model.name
+# Embeddings are cached on disk by (model, text), so only degrees never seen before are encoded
+embeddings = open_cache(model_name, model.encode)
+# Rankings precomputed by `python degree_ranking.py`, or None when they are missing or stale
+rankings = load_rankings(file_path_degrees, model_name, reference_degrees)
 
 def compute_similarity(degrees, reference_degrees):
-    ref_embeddings = model.encode(reference_degrees)
-    offered_embeddings = model.encode(degrees)
+    ref_embeddings = embeddings.encode(reference_degrees)
+    offered_embeddings = embeddings.encode(degrees)
     similarity_matrix = cosine_similarity(offered_embeddings, ref_embeddings)
     return similarity_matrix
 
-# Define the ideal skill vector
-ideal_vector = np.array([1.0, 0.0, 0.0, 0.52381, 0.047619, 0.285714])
-
-# Compute cosine similarity for each user
-user_scores = skill_score_df[["COGNITIVE", "INTERACTIVE", "EMOTIVE", "ADAPTIVE", "CREATIVE", "MOTIVE"]].values
-ideal_vector = ideal_vector.reshape(1, -1)  # Reshape for compatibility
-cosine_similarities = cosine_similarity(user_scores, ideal_vector).flatten()
-skill_score_df["Cosine_Similarity"] = cosine_similarities
-
-# Rank users by similarity (higher is better)
-skill_score_df = skill_score_df.sort_values(by="Cosine_Similarity", ascending=False)
+# Users' similarity to the ideal skill vector, with bins and ranks, most similar first.
+# Scored in chunks once per version of the CSV and persisted, and indexed by user_id
+# so a selection is a lookup rather than a scan (see user_scores.py)
+users = load_user_index(file_path_skills)
+# KD-tree over the users' normalized chakra vectors, built once per version of the CSV
+peers = load_peer_index(file_path_skills)
 
 def rank_degrees():
     """
@@ -74,66 +66,42 @@ def rank_degrees():
             (degree_df["country"] == selected_country)
         ]["degree"].dropna().unique()
         
-        # Compute similarity between offered degrees and reference degrees
-        similarity_matrix = compute_similarity(unique_degrees, reference_degrees)
-
-        ranking_info = []
-        for i, degree in enumerate(unique_degrees):
-            best_match_idx = np.argmax(similarity_matrix[i])
-            best_similarity = similarity_matrix[i][best_match_idx]
-
-            # Skip degrees with zero similarity
-            if best_similarity == 0:
-                continue
-
-            # Determine degree type ranking based on keywords (case-insensitive)
-            lower_degree = degree.lower()
-            if "b.tech" in lower_degree:
-                type_rank = 1
-            elif "b.e" in lower_degree:
-                type_rank = 2
-            elif "diploma" in lower_degree:
-                type_rank = 3
-            else:
-                type_rank = 4  # Other degrees ranked lower than B.Tech, B.E, or Diploma
+        # Look the college up in the precomputed rankings, ranking it here only without them
+        ranked_df = None
+        if rankings is not None:
+            ranked_df = rankings.college(selected_country, selected_learning_pathway, selected_college)
+        if ranked_df is None:
+            # Compute similarity between offered degrees and reference degrees
+            similarity_matrix = compute_similarity(unique_degrees, reference_degrees)
 
-            ranking_info.append((degree, best_match_idx, best_similarity, type_rank))
-
-        # Sort degrees by reference match, type rank, and similarity score
-         # Sort degrees by reference match, type rank, and similarity score
-        ranked_degrees = sorted(ranking_info, key=lambda x: (x[1], x[3], -x[2]))
-
-        # Build a DataFrame to display the ranking
-        ranked_df = pd.DataFrame(ranked_degrees, columns=["Degree", "Reference_Index", "Similarity_Score", "Type_Rank"])
-        ranked_df["Matched_Reference"] = ranked_df["Reference_Index"].apply(lambda idx: reference_degrees[idx])
-        ranked_df["Rank"] = range(1, len(ranked_df) + 1)
-        ranked_df = ranked_df[["Rank", "Degree", "Matched_Reference", "Type_Rank", "Similarity_Score"]]
+            # Best match, degree type and order of all degrees at once (see degree_ranking.py)
+            ranked_df = rank_matches(unique_degrees, similarity_matrix, reference_degrees)
 
 
         st.write("### Ranked Degrees")
         st.dataframe(ranked_df)
         
-        # Split courses into two groups
-        mid_index = len(ranked_df) // 2
-        top_group = ranked_df.iloc[:mid_index]
-        bottom_group = ranked_df.iloc[mid_index:]
-        
         # User selection
-        user_ids = skill_score_df["user_id"].unique()
+        user_ids = users.ids()
         selected_user = st.selectbox("Select User ID", user_ids)
         
         if selected_user:
-            user_row = skill_score_df[skill_score_df["user_id"] == selected_user].iloc[0]
+            user_row = users.lookup(selected_user)
             st.write(f"### User ID: {selected_user}")
             st.write(f"Cosine Similarity to Ideal: {user_row['Cosine_Similarity']:.4f}")
             
-            # Personalized recommendation
-            similarity_rank = skill_score_df.set_index("user_id")["Cosine_Similarity"].rank(ascending=False).get(selected_user, None)
-            recommended_courses = top_group["Degree"].tolist()[:2]
-            recommended_courses.append(random.choice(top_group["Degree"].tolist()) if similarity_rank <= len(top_group) else random.choice(bottom_group["Degree"].tolist()))
+            # Personalized recommendation (see course_recommendation.py)
+            similarity_rank = users.rank(selected_user)
+            recommended_courses = by_rank(ranked_df["Degree"].tolist(), similarity_rank)
             
             st.write("### Recommended Courses")
             st.write(recommended_courses if recommended_courses else "No courses available")
 
+            # Students whose chakra profile is closest to this user's, with their own rank to the ideal
+            peer_df = peers.peers(selected_user)
+            peer_df["Similarity_Rank"] = [users.rank(peer) for peer in peer_df["user_id"]]
+            st.write("### Students Like You")
+            st.dataframe(peer_df)
+
 if __name__ == "__main__":
     rank_degrees()
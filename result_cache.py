@@ -0,0 +1,89 @@
+"""
+Row ids of evaluated filter selections, shared by all sessions.
+
+Entries are keyed by a slice's canonical filter prefix, so a selection is
+evaluated once whatever order its filters were picked in, and are evicted
+least recently used first once they exceed a byte budget.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 2 ** 20
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def rows(self, key, compute):
+        """
+        Row ids for the filter prefix `key`, calling compute() only on a miss.
+
+        A key of None marks a slice that cannot be keyed; it is computed
+        without caching. Cached arrays are made read-only because every
+        session that hits the entry gets the same array.
+        """
+        if key is None:
+            return compute()
+        with self._lock:
+            rows = self._cache.get(key)
+            if rows is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return rows
+            self.misses += 1
+        rows = compute()
+        if rows is None or rows.nbytes > self.max_bytes:
+            return rows
+        rows.setflags(write=False)
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = rows
+                self.nbytes += rows.nbytes
+            self._evict()
+        return rows
+
+    def extended(self, rows, match):
+        """
+        A new cache with the appended `rows` that pass each cached key's
+        filters, found by match(key, rows), added to its result; keys it
+        cannot evaluate (None) are dropped. This cache is left unchanged.
+        """
+        cache = ResultCache(self.max_bytes)
+        cache.hits, cache.misses, cache.evictions = self.hits, self.misses, self.evictions
+        with self._lock:
+            cached = list(self._cache.items())
+        for key, result in cached:
+            matched = match(key, rows)
+            if matched is None:
+                continue
+            if len(matched):
+                # Appended row ids are larger than all cached ones, so the result stays sorted.
+                result = np.concatenate([result, matched])
+                result.setflags(write=False)
+            cache._cache[key] = result
+            cache.nbytes += result.nbytes
+        cache._evict()
+        return cache
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.nbytes = 0
@@ -0,0 +1,112 @@
+"""
+Chunked CSV/Parquet export of filter results.
+
+The slice's row ids are written CHUNK_ROWS at a time, so memory use does not
+grow with the size of the slice:
+
+    with open("programmes.csv", "wb") as f:
+        write_export(df_slice, f, "csv", columns=["name", "cost_int"])
+
+Parquet needs pyarrow; export_formats() only lists it when it is installed.
+"""
+import os
+import tempfile
+
+from result_view import sort_order
+
+CHUNK_ROWS = 50_000
+# format -> (MIME type, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_formats():
+    """Export formats available in this environment."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return ["csv"]
+    return list(FORMATS)
+
+
+def row_chunks(df_slice, columns=None, sort_by=None, ascending=True, chunk_rows=CHUNK_ROWS):
+    """Frames of at most chunk_rows rows of the slice, in display order."""
+    rows = sort_order(df_slice, sort_by, ascending)
+    df = df_slice.index.df
+    positions = None if columns is None else [df.columns.get_loc(column) for column in columns]
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        yield df.iloc[chunk] if positions is None else df.iloc[chunk, positions]
+
+
+def _write_csv(chunks, out):
+    header = True
+    for chunk in chunks:
+        out.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+    # False when there were no rows at all.
+    return not header
+
+
+def _write_parquet(chunks, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # A column that is empty in the first chunk has no type yet; export it as text.
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(out, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    return writer is not None
+
+
+def write_export(df_slice, out, fmt="csv", columns=None, sort_by=None, ascending=True,
+                 chunk_rows=CHUNK_ROWS):
+    """
+    Write the slice to the binary file object `out` as CSV or Parquet.
+
+    Rows are written in the same order as the result table (see
+    result_view.sort_order), restricted to `columns` when given.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    chunks = row_chunks(df_slice, columns, sort_by, ascending, chunk_rows)
+    writer = _write_csv if fmt == "csv" else _write_parquet
+    if not writer(chunks, out):
+        # An empty slice: write the header (or schema) of the selected columns.
+        df = df_slice.index.df
+        writer([df.iloc[:0] if columns is None else df[columns].iloc[:0]], out)
+
+
+def export_file(df_slice, fmt="csv", columns=None, sort_by=None, ascending=True):
+    """
+    The export as a binary file opened for reading at its start.
+
+    It is written to an anonymous temporary file, not to memory, and
+    returned as a plain io.BufferedReader (what st.download_button accepts);
+    the file is removed when the reader is closed.
+    """
+    with tempfile.TemporaryFile() as out:
+        write_export(df_slice, out, fmt, columns, sort_by, ascending)
+        out.flush()
+        # A second descriptor keeps the file alive once `out` is closed.
+        reader = open(os.dup(out.fileno()), "rb")
+    reader.seek(0)
+    return reader
+
+
+def file_name(label, fmt):
+    """File name for an export, e.g. "Engineering_India.csv"."""
+    stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in label).strip("_") or "programmes"
+    return f"{stem}.{FORMATS[fmt][1]}"
@@ -0,0 +1,62 @@
+"""
+Server-side paging, sorting and column projection for filter results.
+
+Rows are ordered by their ids on the index, without copying the frame, and
+only the requested page and columns are taken from the shared frame.
+"""
+import math
+
+import numpy as np
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def sort_order(df_slice, sort_by=None, ascending=True):
+    """
+    The slice's row ids in display order.
+
+    Indexed categorical columns sort on precomputed value ranks and cost
+    columns on their load-time numeric values; other columns fall back to a
+    pandas sort of just this slice. Missing values always go last, and the
+    order is memoized with the slice's facets so paging does not re-sort.
+    """
+    if sort_by is None:
+        return df_slice.row_ids()
+    key = ("sort_order", sort_by, ascending)
+    return df_slice.facets().derived(key, lambda: _sort(df_slice, sort_by, ascending))
+
+
+def _sort(df_slice, sort_by, ascending):
+    index = df_slice.index
+    rows = df_slice.row_ids()
+    if sort_by in index.costs:
+        cost = index.costs[sort_by]
+        costs = cost.values[rows]
+        order = np.argsort(costs if ascending else -costs, kind="stable")
+        missing = cost.missing[rows[order]]
+        return np.concatenate([rows[order[~missing]], rows[order[missing]]])
+    if sort_by in index.columns:
+        column = index.columns[sort_by]
+        codes = column.codes[rows]
+        ranks = column.sort_ranks()[codes]
+        order = np.argsort(ranks if ascending else -ranks, kind="stable")
+        missing = codes[order] == 0
+        return np.concatenate([rows[order[~missing]], rows[order[missing]]])
+    values = index.df[sort_by].iloc[rows].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return rows[order]
+
+
+def page_count(total, page_size):
+    return max(1, math.ceil(total / page_size))
+
+
+def page_frame(df_slice, page=1, page_size=PAGE_SIZES[0], columns=None, sort_by=None, ascending=True):
+    """Rows of one page (1-based) of the slice, restricted to `columns`."""
+    order = sort_order(df_slice, sort_by, ascending)
+    start = (page - 1) * page_size
+    rows = order[start:start + page_size]
+    df = df_slice.index.df
+    if columns is None:
+        return df.iloc[rows]
+    return df.iloc[rows, [df.columns.get_loc(column) for column in columns]]
@@ -0,0 +1,138 @@
+"""
+Synthetic All_country_data.csv generator for benchmarking the filter apps.
+
+Rows have the real dataset's columns, plausible cardinalities and its cost
+quirks (IDR in `cost` for Indonesia, missing and non-numeric costs), and are
+written in chunks:
+
+    python synthetic_data.py --rows 1000000 --out bench/1m/All_country_data.csv
+    python synthetic_data.py --preset 10m --out bench/10m/All_country_data.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+PRESETS = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+CHUNK_ROWS = 500_000
+
+LEARNING_PATHWAYS = ["Engineering", "Medicine", "Management", "Arts", "Science", "Law", "Design", "Commerce"]
+
+# country: (share of rows, number of states; 0 means the state column is empty)
+COUNTRIES = {
+    "India": (0.34, 36),
+    "USA": (0.20, 50),
+    "United Kingdom": (0.08, 4),
+    "Canada": (0.06, 13),
+    "Australia": (0.06, 8),
+    "New Zealand": (0.02, 16),
+    "Indonesia": (0.05, 34),
+    "Bangladesh": (0.04, 8),
+    "Philippines": (0.04, 17),
+    "Malaysia": (0.03, 16),
+    "Vietnam": (0.03, 0),
+    "Singapore": (0.02, 0),
+    "Hong-kong": (0.01, 0),
+    "Hong Kong": (0.02, 0),
+}
+
+INSTITUTION_TYPES = ["Public", "Private", "Deemed", "Autonomous", "Community College"]
+DEGREE_LEVELS = ["Undergraduate", "Postgraduate", "Diploma", "Doctorate", "Certificate"]
+DEGREE_PREFIXES = ["B.Tech", "B.E", "B.Sc", "B.A", "BBA", "MBBS", "M.Tech", "M.Sc", "MBA", "M.A", "Diploma", "PhD"]
+DEGREE_SUBJECTS = 40
+
+MISSING_SHARE = 0.03
+NOT_A_NUMBER_SHARE = 0.02
+
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _choice(rng, values, n, weights=None):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n, p=weights)]
+
+
+def _with_missing(rng, values, share=MISSING_SHARE):
+    values = values.astype(object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def _costs(rng, n, low, high):
+    """Cost strings as in the CSV: mostly round numbers, some blanks and free text."""
+    costs = (np.exp(rng.uniform(np.log(low), np.log(high), size=n)) // 100 * 100).astype(np.int64)
+    costs = costs.astype(str).astype(object)
+    noise = rng.random(n)
+    costs[noise < NOT_A_NUMBER_SHARE] = "Not Available"
+    costs[noise > 1 - MISSING_SHARE] = None
+    return costs
+
+
+def generate_chunk(n_rows, rng, n_institutions):
+    countries = list(COUNTRIES)
+    country = _choice(rng, countries, n_rows, np.array([COUNTRIES[c][0] for c in countries]))
+
+    state = np.full(n_rows, None, dtype=object)
+    for name, (_, n_states) in COUNTRIES.items():
+        rows = np.flatnonzero(country == name)
+        if n_states and len(rows):
+            labels = [f"{name} State {i + 1}" for i in range(n_states)]
+            state[rows] = _choice(rng, labels, len(rows), _zipf_weights(n_states, 0.8))
+
+    degrees = [f"{prefix} {subject + 1}" for prefix in DEGREE_PREFIXES for subject in range(DEGREE_SUBJECTS)]
+    institution = rng.choice(n_institutions, size=n_rows, p=_zipf_weights(n_institutions, 0.7))
+
+    cost = np.full(n_rows, None, dtype=object)
+    cost_int = _costs(rng, n_rows, 1_000, 80_000)
+    indonesia = np.flatnonzero(country == "Indonesia")
+    cost[indonesia] = _costs(rng, len(indonesia), 5_000_000, 300_000_000)
+    cost_int[indonesia] = None
+
+    return pd.DataFrame({
+        "name": "Institute " + pd.Series(institution + 1).astype(str),
+        "Learning_Pathway": _choice(rng, LEARNING_PATHWAYS, n_rows, _zipf_weights(len(LEARNING_PATHWAYS), 0.6)),
+        "country": country,
+        "state": state,
+        "institution_type": _with_missing(rng, _choice(rng, INSTITUTION_TYPES, n_rows, [0.35, 0.4, 0.1, 0.1, 0.05])),
+        "degree_level": _with_missing(rng, _choice(rng, DEGREE_LEVELS, n_rows, [0.45, 0.35, 0.1, 0.05, 0.05])),
+        "degree": _choice(rng, degrees, n_rows, _zipf_weights(len(degrees))),
+        "cost": cost,
+        "cost_int": cost_int,
+    })
+
+
+def write_dataset(path, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write `n_rows` synthetic rows to the CSV at `path`, chunk by chunk."""
+    rng = np.random.default_rng(seed)
+    # Roughly 2,500 institutions per million rows.
+    n_institutions = max(50, n_rows // 400)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            generate_chunk(size, rng, n_institutions).to_csv(f, index=False, header=written == 0)
+            written += size
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic All_country_data.csv.")
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--rows", type=int, help="number of rows")
+    size.add_argument("--preset", choices=sorted(PRESETS), help="100k, 1m or 10m rows")
+    parser.add_argument("--out", default="All_country_data.csv", help="output CSV (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    n_rows = args.rows if args.rows is not None else PRESETS[args.preset]
+    write_dataset(args.out, n_rows, args.seed)
+    print(f"Wrote {n_rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
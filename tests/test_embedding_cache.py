@@ -0,0 +1,26 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def _encode(texts):
+    return np.array([[len(text), ord(text[0]), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_rows_without_keys_are_ignored_and_dropped(tmp_path):
+    cache = EmbeddingCache("model", _encode, str(tmp_path))
+    cache.encode(["alpha", "beta"])
+    # An append that died after writing its vectors but before its keys.
+    with open(cache._file("vectors.f32"), "ab") as f:
+        f.write(np.ones((2, 3), dtype=np.float32).tobytes()[:20])
+    with open(cache._file("keys.txt"), "a") as f:
+        f.write("deadbeef")
+
+    reader = EmbeddingCache("model", _encode, str(tmp_path))
+    assert len(reader) == 2
+    assert np.array_equal(reader.encode(["gamma", "alpha"]), _encode(["gamma", "alpha"]))
+    assert reader.misses == 1
+
+    fresh = EmbeddingCache("model", _encode, str(tmp_path))
+    assert np.array_equal(fresh.encode(["alpha", "beta", "gamma"]), _encode(["alpha", "beta", "gamma"]))
+    assert fresh.misses == 0
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from peer_index import PeerIndex, read_vectors
+from user_scores import SKILL_COLUMNS
+
+
+def _write(tmp_path, skills):
+    users = pd.DataFrame(skills, columns=SKILL_COLUMNS)
+    users.insert(0, "user_id", range(len(users)))
+    path = tmp_path / "skill_score_data.csv"
+    users.to_csv(path, index=False)
+    return str(path)
+
+
+def test_unscored_users_are_left_out(tmp_path):
+    skills = np.random.default_rng(0).random((5, len(SKILL_COLUMNS)))
+    skills[1] = 0
+    skills[2, 3] = np.nan
+    user_ids, vectors, _ = read_vectors(_write(tmp_path, skills))
+    assert user_ids.tolist() == [0, 3, 4]
+    assert np.isfinite(vectors).all()
+    assert PeerIndex.build(user_ids, vectors).peers(0, 1)["user_id"].tolist() in ([3], [4])
+
+
+def test_no_scored_users_has_no_peers(tmp_path):
+    for skills in (np.empty((0, len(SKILL_COLUMNS))), np.zeros((2, len(SKILL_COLUMNS)))):
+        index = PeerIndex.build(*read_vectors(_write(tmp_path, skills)))
+        assert len(index) == 0 and index.tree is None
+        assert index.peers(0).empty
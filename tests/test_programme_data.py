@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from programme_data import load_programmes, load_shared_frame
+
+HEADER = "name,country,cost_int\n"
+
+
+def _append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+@pytest.mark.parametrize("load", [lambda path: load_programmes(path, use_snapshot=False), load_shared_frame])
+def test_unterminated_last_line_is_read_once_the_file_settles(tmp_path, load):
+    if load is load_shared_frame:
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / "All_country_data.csv")
+    with open(path, "w") as f:
+        f.write(HEADER + "A,India,100\n")
+    load(path)
+    _append(path, "B,India,200\nC,India,300")
+    # The last line may still be being written: only complete lines are taken in.
+    assert len(load(path)) == 2
+    # Unchanged since then, so the last line is complete.
+    df = load(path)
+    assert df["name"].tolist() == ["A", "B", "C"]
+    assert len(pd.read_csv(path)) == 3
+
+
+def test_rows_appended_after_an_unterminated_line_reload_the_file(tmp_path):
+    path = str(tmp_path / "All_country_data.csv")
+    with open(path, "w") as f:
+        f.write(HEADER + "A,India,100\nB,India,200")
+    load_programmes(path, use_snapshot=False)
+    _append(path, "0\nC,India,300\n")
+    assert load_programmes(path, use_snapshot=False)["cost_int"].tolist() == [100, 2000, 300]
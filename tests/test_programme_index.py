@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from cost_normalization import NORMALIZED_COST, normalized_costs
+from programme_index import ColumnIndex, CostIndex, ProgrammeIndex
+
+
+def _same_column(extended, built):
+    assert extended.values[1:] == built.values[1:]
+    assert extended.codes.tolist() == built.codes.tolist()
+    for code in range(len(built.values)):
+        assert extended.posting(code).tolist() == built.posting(code).tolist()
+
+
+def test_column_extend_matches_a_rebuild():
+    head = pd.Series(["b", None, "a", "b"])
+    tail = pd.Series(["c", "a", None, "c", "b"])
+    extended = ColumnIndex.build(head).extend(tail)
+    _same_column(extended, ColumnIndex.build(pd.concat([head, tail], ignore_index=True)))
+
+
+def test_column_extend_keeps_existing_codes():
+    column = ColumnIndex.build(pd.Series(["x", "y"]))
+    extended = column.extend(pd.Series(["z", "x"]))
+    assert extended.codes[:2].tolist() == column.codes.tolist()
+    assert extended.lookup["z"] == 3
+    # The original is not modified.
+    assert len(column.codes) == 2 and column.values == [None, "x", "y"]
+
+
+def test_cost_extend_values_matches_a_rebuild():
+    rng = np.random.default_rng(0)
+    head = rng.integers(0, 5, 50).astype(np.float64)
+    tail = rng.integers(0, 5, 30).astype(np.float64)
+    tail[[3, 7]] = np.nan
+    extended = CostIndex.from_values(head).extend_values(tail)
+    built = CostIndex.from_values(np.concatenate([head, tail]))
+    for part, array in built.arrays().items():
+        assert np.array_equal(extended.arrays()[part], array, equal_nan=True), part
+
+
+def test_cost_extend_keeps_missing_costs():
+    cost = CostIndex.build(pd.Series([10, None]))
+    extended = cost.extend(pd.Series(["Not Available", 5]))
+    assert extended.values.tolist() == [10, 0, 0, 5]
+    assert extended.missing.tolist() == [False, True, True, False]
+    assert extended.below(5) == 3
+
+
+def test_extended_index_leaves_the_original_alone():
+    head = pd.DataFrame({"country": ["India", "USA"], "state": ["Goa", "Ohio"], "cost_int": [1, 2]})
+    df = pd.concat([head, pd.DataFrame({"country": ["India"], "state": ["Kerala"], "cost_int": [3]})],
+                   ignore_index=True)
+    index = ProgrammeIndex(head)
+    india = index.all().isin("country", ["India"])
+    assert india.value_counts("state") == {"Goa": 1}
+
+    extended = index.extended(df, 2)
+    assert extended.all().isin("country", ["India"]).value_counts("state") == {"Goa": 1, "Kerala": 1}
+    assert extended.facets.hits == 1
+    assert index.n_rows == 2 and index.df is head
+    assert index.all().isin("country", ["India"]).value_counts("state") == {"Goa": 1}
+
+
+def test_cost_range_covers_fractional_costs():
+    df = pd.DataFrame({"country": ["India"] * 3, "cost_int": [1000, 2501, None]})
+    low, high = ProgrammeIndex(df).all().cost_range(NORMALIZED_COST)
+    costs = normalized_costs(df)
+    assert low <= np.nanmin(costs) and high >= np.nanmax(costs)
+    assert isinstance(high, int)
@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from programme_partitions import MANIFEST, PartitionedProgrammes, load_partitioned, partition_dir, partition_file
+
+ROWS = pd.DataFrame({
+    "name": ["A", "B", "C", "D"],
+    "Learning_Pathway": ["Engineering", "Engineering", "Engineering", "Medicine"],
+    "country": ["India", "Australia", "New Zealand", "India"],
+    "cost_int": [100, 200, 300, 400],
+})
+
+
+def _file_times(directory):
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+
+def test_counts_and_partitions_from_the_shared_frame(tmp_path):
+    path = str(tmp_path / "All_country_data.csv")
+    ROWS.to_csv(path, index=False)
+    store = load_partitioned(path)
+    assert isinstance(store, PartitionedProgrammes)
+    assert store.counts() == {"Engineering": 3, "Medicine": 1}
+    merged = store.index("Engineering", ["New Zealand", "Australia"])
+    assert merged.df["name"].tolist() == ["B", "C"]
+
+
+def test_append_rewrites_only_the_affected_partitions(tmp_path):
+    path = str(tmp_path / "All_country_data.csv")
+    ROWS.to_csv(path, index=False)
+    store = load_partitioned(path)
+    india = store.index("Engineering", ["India"])
+    before = _file_times(partition_dir(path))
+
+    appended = pd.DataFrame({"name": ["E", "F"], "Learning_Pathway": ["Engineering", "Law"],
+                             "country": ["India", "Canada"], "cost_int": [500, 600]})
+    appended.to_csv(path, mode="a", header=False, index=False)
+    extended = load_partitioned(path)
+
+    after = _file_times(partition_dir(path))
+    changed = {name for name, mtime in after.items() if before.get(name) != mtime}
+    assert changed == {MANIFEST, partition_file("Engineering", "India"), partition_file("Law", "Canada")}
+    assert extended.counts() == {"Engineering": 4, "Medicine": 1, "Law": 1}
+    assert extended.index("Engineering", ["India"]).df["name"].tolist() == ["A", "E"]
+    # The store and selection sessions may still be reading are left as they were.
+    assert store.counts() == {"Engineering": 3, "Medicine": 1}
+    assert india.df["name"].tolist() == ["A"]
+    assert extended.misses == store.misses
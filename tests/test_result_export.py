@@ -0,0 +1,45 @@
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import filter_ui
+from programme_index import ProgrammeIndex
+
+COLUMNS = ["name", "cost_int"]
+
+
+def _slice():
+    df = pd.DataFrame({
+        "Learning_Pathway": ["Engineering"] * 3,
+        "country": ["India"] * 3,
+        "name": ["A", "B", "C"],
+        "cost_int": [300, 100, 200],
+    })
+    return ProgrammeIndex(df).all()
+
+
+def _download_data(monkeypatch, fmt):
+    """The bytes Streamlit serves when the export button of a slice is clicked."""
+    clicked = {}
+    monkeypatch.setattr(filter_ui.st, "radio", lambda *args, **kwargs: fmt)
+    monkeypatch.setattr(filter_ui.st, "download_button", lambda *args, data, **kwargs: clicked.update(data=data))
+    filter_ui.export_button(_slice(), COLUMNS, sort_by="cost_int")
+    data = clicked["data"]()
+    try:
+        return convert_data_to_bytes_and_infer_mime(data, ValueError("unsupported download data"))[0]
+    finally:
+        data.close()
+
+
+def test_csv_download(monkeypatch):
+    data = _download_data(monkeypatch, "csv")
+    assert data.decode("utf-8").splitlines() == ["name,cost_int", "B,100", "C,200", "A,300"]
+
+
+def test_parquet_download(monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = _download_data(monkeypatch, "parquet")
+    frame = pq.read_table(io.BytesIO(data)).to_pandas()
+    assert frame.to_dict("list") == {"name": ["B", "C", "A"], "cost_int": [100, 200, 300]}
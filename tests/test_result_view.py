@@ -0,0 +1,27 @@
+import pandas as pd
+
+from programme_index import ProgrammeIndex
+from result_view import sort_order
+
+
+def _slice(costs):
+    df = pd.DataFrame({
+        "Learning_Pathway": ["Engineering"] * len(costs),
+        "country": ["India"] * len(costs),
+        "name": [f"College {i}" for i in range(len(costs))],
+        "cost_int": costs,
+    })
+    return ProgrammeIndex(df).all()
+
+
+def test_missing_costs_sort_last_in_both_directions():
+    df_slice = _slice([300, None, 100, "Not Available", 200])
+    assert sort_order(df_slice, "cost_int", ascending=True).tolist() == [2, 4, 0, 1, 3]
+    assert sort_order(df_slice, "cost_int", ascending=False).tolist() == [0, 4, 2, 1, 3]
+
+
+def test_missing_costs_sort_last_after_append():
+    index = ProgrammeIndex(pd.DataFrame({"country": ["India", "India"], "cost_int": [None, 50]}))
+    df = pd.DataFrame({"country": ["India"] * 4, "cost_int": [None, 50, 10, "Not Available"]})
+    index = index.extended(df, 2)
+    assert sort_order(index.all(), "cost_int").tolist() == [2, 1, 0, 3]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from user_scores import SKILL_COLUMNS, UserIndex, score_file, similarities
+
+
+def _users(n, seed=0):
+    rng = np.random.default_rng(seed)
+    skills = pd.DataFrame(rng.random((n, len(SKILL_COLUMNS))), columns=SKILL_COLUMNS)
+    return pd.concat([pd.DataFrame({"user_id": np.arange(n) * 10}), skills], axis=1)
+
+
+def _index(users, tmp_path, name):
+    path = tmp_path / f"{name}.csv"
+    users.to_csv(path, index=False)
+    return UserIndex(score_file(str(path), chunk_rows=7))
+
+
+def _update(index, rebuilt, user_ids):
+    # The rebuild's own similarities, so that ties are not lost to rounding in a different batch.
+    index.update(user_ids, [rebuilt.lookup(user_id)["Cosine_Similarity"] for user_id in user_ids])
+
+
+def _assert_same(updated, rebuilt):
+    assert len(updated) == len(rebuilt)
+    for user_id in rebuilt.ids().tolist():
+        got, want = updated.lookup(user_id), rebuilt.lookup(user_id)
+        assert np.isclose(got["Cosine_Similarity"], want["Cosine_Similarity"], equal_nan=True), user_id
+        assert np.isclose(got["Similarity_Rank"], want["Similarity_Rank"], equal_nan=True), user_id
+        assert got["Similarity_Bin"] == want["Similarity_Bin"], user_id
+
+
+def _change(users, rows, skills):
+    users = users.copy()
+    users.loc[rows, SKILL_COLUMNS] = skills
+    return users
+
+
+TOP = [1.0, 0.0, 0.0, 0.52381, 0.047619, 0.285714]
+BOTTOM = [0.0, 1.0, 1.0, 0.0, 0.0, 0.0]
+MIDDLE = [0.5] * len(SKILL_COLUMNS)
+
+
+def _extremes(users):
+    scores = np.nan_to_num(similarities(users[SKILL_COLUMNS].to_numpy(dtype=np.float64, copy=True)), nan=0.5)
+    return [int(scores.argmax()), int(scores.argmin())]
+
+
+@pytest.mark.parametrize("edit", [
+    # A few users move within the current range.
+    lambda users: ([3, 17, 28], np.random.default_rng(1).random((3, len(SKILL_COLUMNS)))),
+    # The highest similarity grows and the lowest shrinks: every bin moves.
+    lambda users: ([5, 6], [TOP, BOTTOM]),
+    # The current extremes move inwards.
+    lambda users: (_extremes(users), [MIDDLE, MIDDLE]),
+    # Users lose their scores, or get them back.
+    lambda users: ([2, 9], np.nan),
+    lambda users: ([20, 30], [MIDDLE, TOP]),
+    # Ties with an existing user.
+    lambda users: ([11, 12], users.loc[[4, 4], SKILL_COLUMNS].to_numpy()),
+])
+def test_update_matches_a_rebuild(tmp_path, edit):
+    users = _users(40)
+    users.loc[[20, 30], SKILL_COLUMNS] = np.nan
+    index = _index(users, tmp_path, "before")
+    rows, skills = edit(users)
+    users = _change(users, rows, skills)
+    rebuilt = _index(users, tmp_path, "after")
+    _update(index, rebuilt, users.loc[rows, "user_id"].tolist())
+    _assert_same(index, rebuilt)
+
+
+def test_update_adds_new_users(tmp_path):
+    users = _users(30)
+    index = _index(users, tmp_path, "before")
+    new = _users(35, seed=2).iloc[30:].assign(user_id=lambda df: df["user_id"] + 1)
+    new.loc[new.index[0], SKILL_COLUMNS] = TOP
+    new.loc[new.index[1], SKILL_COLUMNS] = np.nan
+    rebuilt = _index(pd.concat([users, new], ignore_index=True), tmp_path, "after")
+    _update(index, rebuilt, new["user_id"].tolist())
+    _assert_same(index, rebuilt)
+
+
+def test_repeated_updates_match_a_rebuild(tmp_path):
+    users = _users(50)
+    index = _index(users, tmp_path, "before")
+    rng = np.random.default_rng(3)
+    for step in range(5):
+        rows = rng.choice(len(users), 6, replace=False)
+        users = _change(users, rows, rng.random((6, len(SKILL_COLUMNS))))
+        users.loc[rows[:1], SKILL_COLUMNS] = np.nan if step % 2 else BOTTOM
+        rebuilt = _index(users, tmp_path, f"step{step}")
+        _update(index, rebuilt, users.loc[rows, "user_id"].tolist())
+        _assert_same(index, rebuilt)
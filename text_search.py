@@ -0,0 +1,89 @@
+"""
+Type-ahead search over the distinct values of a categorical column.
+
+TrigramIndex maps every three-letter gram to the values that contain it.
+Matching ignores case and punctuation, and words of one or two letters must
+start a word of the value. Prefix matches rank first, then word-prefix
+matches, then the rest, with more common values first within each group.
+"""
+import heapq
+import re
+
+# Dots and apostrophes join ("B.Tech" -> "btech"); other punctuation separates words.
+_JOINERS = re.compile(r"[.'’]")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    return _SEPARATORS.sub(" ", _JOINERS.sub("", str(text).lower())).strip()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self, values):
+        self.values = list(values)
+        self.keys = [normalize(value) for value in self.values]
+        self.positions = {value: position for position, value in enumerate(self.values)}
+        grams = {}
+        for position, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                grams.setdefault(gram, []).append(position)
+            for word in key.split():
+                for prefix in {word[:1], word[:2]}:
+                    grams.setdefault(f" {prefix}", []).append(position)
+        self.grams = {gram: frozenset(positions) for gram, positions in grams.items()}
+
+    def candidates(self, words):
+        """Positions of values that may match every word (a superset of the matches)."""
+        grams = set()
+        for word in words:
+            grams |= trigrams(word) if len(word) >= 3 else {f" {word}"}
+        postings = sorted((self.grams.get(gram, frozenset()) for gram in grams), key=len)
+        found = set(postings[0])
+        for posting in postings[1:]:
+            if not found:
+                break
+            found &= posting
+        return found
+
+    @staticmethod
+    def matches(key, words):
+        spaced = f" {key}"
+        return all(word in key if len(word) >= 3 else f" {word}" in spaced for word in words)
+
+    def search(self, query, counts, limit=50):
+        """
+        Up to `limit` (value, count) pairs matching `query`, best first.
+
+        counts maps values to their number of rows in the current slice;
+        values missing from it (or with a zero count) are not in the slice
+        and are skipped.
+        """
+        query = normalize(query)
+        words = query.split()
+        if not words:
+            return []
+        candidates = self.candidates(words)
+        if len(counts) < len(candidates):
+            # A narrow slice: only its own values can match.
+            candidates = candidates.intersection(
+                self.positions[value] for value, count in counts.items() if count and value in self.positions)
+        ranked = []
+        for position in candidates:
+            value = self.values[position]
+            count = counts.get(value, 0)
+            key = self.keys[position]
+            if not count or not self.matches(key, words):
+                continue
+            if key.startswith(query):
+                tier = 0
+            elif f" {words[0]}" in f" {key}":
+                tier = 1
+            else:
+                tier = 2
+            ranked.append((tier, -count, key, position))
+        return [(self.values[position], -negative_count)
+                for _, negative_count, _, position in heapq.nsmallest(limit, ranked)]
@@ -0,0 +1,262 @@
+"""
+How close each user's chakra scores are to the ideal profile.
+
+score_file() reads skill_score_data.csv in chunks and computes, per user:
+
+    Cosine_Similarity   similarity to IDEAL_VECTOR
+    Similarity_Bin      np.digitize against BIN_EDGES edges spaced evenly
+                        from the lowest to the highest similarity (1..5)
+    Similarity_Rank     rank by similarity, 1 = closest, ties averaged
+
+load_scores() keeps the result in skill_score_data.scores.parquet, keyed by
+the CSV signature. UserIndex looks users up by user_id; its update() only
+re-ranks the users whose rank can change.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from programme_data import source_signature
+
+DEFAULT_PATH = "skill_score_data.csv"
+SKILL_COLUMNS = ["COGNITIVE", "INTERACTIVE", "EMOTIVE", "ADAPTIVE", "CREATIVE", "MOTIVE"]
+IDEAL_VECTOR = np.array([1.0, 0.0, 0.0, 0.52381, 0.047619, 0.285714])
+BIN_EDGES = 5
+SCORE_COLUMNS = ["user_id", "Cosine_Similarity", "Similarity_Bin", "Similarity_Rank"]
+# Rows of the CSV read at a time.
+CHUNK_ROWS = 200_000
+METADATA_KEY = b"user_scores"
+
+_lock = threading.Lock()
+_loaded = {}
+_indexes = {}
+
+
+def scores_path(path):
+    return os.path.splitext(path)[0] + ".scores.parquet"
+
+
+def normalize_rows(values):
+    """Scale every row of `values` (float64) to unit length in place; rows of zeros stay zero."""
+    norms = np.sqrt(np.einsum("ij,ij->i", values, values))
+    norms[norms == 0] = 1
+    values /= norms[:, np.newaxis]
+    return values
+
+
+def similarities(values, ideal=IDEAL_VECTOR):
+    """
+    Cosine similarity of every row of `values` (float64, normalized in
+    place) to `ideal`; rows of zeros get 0, as with sklearn.
+    """
+    normalize_rows(values)
+    ideal = ideal / np.linalg.norm(ideal)
+    return (values @ ideal.reshape(-1, 1)).ravel()
+
+
+def similarity_bins(similarities):
+    bins = np.linspace(np.nanmin(similarities), np.nanmax(similarities), num=BIN_EDGES)
+    return np.digitize(similarities, bins)
+
+
+def _sorted_ranks(ordered):
+    """Ranks of the descending array `ordered`, ties averaged, NaN (sorted last) for NaN."""
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ends = np.r_[starts[1:], len(ordered)]
+    ranks = np.repeat((starts + ends + 1) / 2, ends - starts)
+    ranks[np.isnan(ordered)] = np.nan
+    return ranks
+
+
+def average_ranks(values):
+    """Descending ranks of `values`, 1 = highest, ties averaged, NaN for NaN."""
+    order = np.argsort(-values, kind="stable")
+    ranks = np.empty(len(values))
+    ranks[order] = _sorted_ranks(values[order])
+    return ranks
+
+
+def score_file(path=DEFAULT_PATH, chunk_rows=CHUNK_ROWS):
+    """Scores of every user in the CSV at `path` (SCORE_COLUMNS, most similar first)."""
+    user_ids = []
+    scores = []
+    for chunk in pd.read_csv(path, usecols=["user_id"] + SKILL_COLUMNS, chunksize=chunk_rows):
+        user_ids.append(chunk["user_id"].to_numpy())
+        scores.append(similarities(chunk[SKILL_COLUMNS].to_numpy(dtype=np.float64)))
+    if not scores:
+        return pd.DataFrame({column: [] for column in SCORE_COLUMNS})
+    user_ids = np.concatenate(user_ids)
+    scores = np.concatenate(scores)
+    # Stable, so users with the same similarity stay in file order.
+    order = np.argsort(-scores, kind="stable")
+    user_ids = user_ids[order]
+    scores = scores[order]
+    del order
+    return pd.DataFrame({
+        "user_id": user_ids,
+        "Cosine_Similarity": scores,
+        "Similarity_Bin": similarity_bins(scores),
+        "Similarity_Rank": _sorted_ranks(scores),
+    }, copy=False)
+
+
+class UserIndex:
+    """Scores of every user, looked up by user_id in constant time."""
+
+    def __init__(self, scores):
+        self.user_ids = scores["user_id"].to_numpy(copy=True)
+        self.similarity = scores["Cosine_Similarity"].to_numpy(dtype=np.float64, copy=True)
+        self.bins = scores["Similarity_Bin"].to_numpy(copy=True)
+        self.ranks = scores["Similarity_Rank"].to_numpy(dtype=np.float64, copy=True)
+        self._positions = {}
+        for position, user_id in enumerate(self.user_ids.tolist()):
+            # A repeated user_id finds its first (most similar) row.
+            self._positions.setdefault(user_id, position)
+        # Ascending similarities without NaN, to rank changed users by bisection.
+        self._sorted = np.sort(self.similarity[~np.isnan(self.similarity)])
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, user_id):
+        return user_id in self._positions
+
+    def ids(self):
+        """Every user_id once, in row order (most similar first after load)."""
+        if len(self._positions) == len(self.user_ids):
+            return self.user_ids
+        return pd.unique(self.user_ids)
+
+    def position(self, user_id):
+        return self._positions.get(user_id)
+
+    def lookup(self, user_id):
+        """The user's scores (keyed like SCORE_COLUMNS), or None for an unknown user."""
+        position = self._positions.get(user_id)
+        if position is None:
+            return None
+        return {
+            "user_id": self.user_ids[position],
+            "Cosine_Similarity": self.similarity[position],
+            "Similarity_Bin": self.bins[position],
+            "Similarity_Rank": self.ranks[position],
+        }
+
+    def rank(self, user_id):
+        position = self._positions.get(user_id)
+        return None if position is None else self.ranks[position]
+
+    def _ranks_of(self, values):
+        below = np.searchsorted(self._sorted, values, side="left")
+        above = len(self._sorted) - np.searchsorted(self._sorted, values, side="right")
+        ranks = above + (len(self._sorted) - above - below + 1) / 2
+        ranks[np.isnan(values)] = np.nan
+        return ranks
+
+    def update(self, user_ids, similarities):
+        """Set the similarity of `user_ids`, adding the ones not seen before."""
+        similarities = np.asarray(similarities, dtype=np.float64)
+        latest = {}
+        for user_id, similarity in zip(list(user_ids), similarities.tolist()):
+            latest[user_id] = similarity
+        new = [user_id for user_id in latest if user_id not in self._positions]
+        if new:
+            start = len(self.user_ids)
+            self.user_ids = np.concatenate([self.user_ids, np.asarray(new, dtype=self.user_ids.dtype)])
+            self.similarity = np.concatenate([self.similarity, np.full(len(new), np.nan)])
+            self.bins = np.concatenate([self.bins, np.zeros(len(new), dtype=self.bins.dtype)])
+            self.ranks = np.concatenate([self.ranks, np.full(len(new), np.nan)])
+            for offset, user_id in enumerate(new):
+                self._positions[user_id] = start + offset
+        positions = np.fromiter((self._positions[user_id] for user_id in latest), dtype=np.int64,
+                                count=len(latest))
+        values = np.fromiter(latest.values(), dtype=np.float64, count=len(latest))
+        old = self.similarity[positions]
+        edges = (self._sorted[0], self._sorted[-1]) if len(self._sorted) else None
+
+        # Take the old values out of the sorted array and put the new ones in.
+        old_values = np.sort(old[~np.isnan(old)])
+        if len(old_values):
+            first = np.searchsorted(old_values, old_values, side="left")
+            at = np.searchsorted(self._sorted, old_values, side="left") + np.arange(len(old_values)) - first
+            self._sorted = np.delete(self._sorted, at)
+        new_values = np.sort(values[~np.isnan(values)])
+        self._sorted = np.insert(self._sorted, np.searchsorted(self._sorted, new_values), new_values)
+        self.similarity[positions] = values
+
+        # Only users between an old and a new value change rank, or every user
+        # below a value that was added or removed (a new user, a NaN).
+        changed = np.concatenate([old, values])
+        changed = changed[~np.isnan(changed)]
+        affected = np.zeros(len(self.similarity), dtype=bool)
+        if len(changed):
+            low = -np.inf if (np.isnan(old) != np.isnan(values)).any() else changed.min()
+            affected = (self.similarity >= low) & (self.similarity <= changed.max())
+        affected[positions] = True
+        self.ranks[affected] = self._ranks_of(self.similarity[affected])
+
+        if len(self._sorted) and (self._sorted[0], self._sorted[-1]) != edges:
+            self.bins = similarity_bins(self.similarity).astype(self.bins.dtype)
+        elif len(self._sorted):
+            self.bins[positions] = similarity_bins(np.r_[self._sorted[[0, -1]], values])[2:]
+
+
+def load_user_index(path=DEFAULT_PATH):
+    """The process-wide UserIndex of the scores of `path`, rebuilt when the CSV changes."""
+    scores = load_scores(path)
+    with _lock:
+        cached = _indexes.get(os.path.abspath(path))
+        if cached is not None and cached[0] is scores:
+            return cached[1]
+        index = UserIndex(scores)
+        _indexes[os.path.abspath(path)] = (scores, index)
+        return index
+
+
+def _read_scores(out, signature):
+    import pyarrow.parquet as pq
+
+    try:
+        metadata = (pq.read_schema(out).metadata or {}).get(METADATA_KEY)
+        if metadata is None or json.loads(metadata)["signature"] != signature:
+            return None
+        return pq.read_table(out).to_pandas()
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_scores(scores, out, signature):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(scores, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           METADATA_KEY: json.dumps({"signature": signature}).encode()})
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, out)
+
+
+def load_scores(path=DEFAULT_PATH):
+    """Scores of every user (see score_file), from the persisted file when it is current."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pyarrow = None
+    key = os.path.abspath(path)
+    signature = source_signature(path)
+    with _lock:
+        cached = _loaded.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        out = scores_path(path)
+        scores = _read_scores(out, signature) if pyarrow is not None else None
+        if scores is None:
+            scores = score_file(path)
+            if pyarrow is not None:
+                _write_scores(scores, out, signature)
+        _loaded[key] = (signature, scores)
+        return scores